@@ -0,0 +1,94 @@
+############################################################################
+# bench_concat.py
+#
+#   Time and peak memory of utilities.concat_frames against pd.concat for
+#   per-file frames with slightly different columns
+#
+#   usage: python benchmarks/bench_concat.py [n_files ...]
+#
+#   Peak memory is the growth of the max RSS of a child process while
+#   concatenating.  glibc may keep freed frames in its heap, so run with
+#   MALLOC_MMAP_THRESHOLD_=131072 to see the memory released by
+#   concat_frames
+#
+############################################################################
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import numpy as np
+import pandas as pd
+osjoin = os.path.join
+DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.abspath(osjoin(DIR, '..')))
+from fivecentfileio import utilities as util
+
+
+def make_frames(n_files, n_rows, n_cols=20):
+    """
+    Per-file frames where every other file has an extra int column
+    """
+
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(n_files):
+        df = pd.DataFrame(rng.normal(size=(n_rows, n_cols)),
+                          columns=['Col%s' % i for i in range(n_cols)])
+        df['Int'] = i
+        if i % 2:
+            df['Extra%s' % (i % 5)] = i
+        frames += [df]
+
+    return frames
+
+
+def _measure(case, n_files, n_rows, queue):
+    """
+    Concatenate in a child process and report (seconds, peak MB)
+    """
+
+    frames = make_frames(n_files, n_rows)
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if case == 'pd.concat':
+        df = pd.concat(frames, axis=0)
+        del frames
+    else:
+        df = util.concat_frames(frames)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+    queue.put((seconds, peak / 1e3))
+
+
+def run(sizes=(100, 1000), n_rows=20000):
+    """
+    Time both implementations
+
+    Args:
+        sizes (tuple): numbers of frames to concatenate
+        n_rows (int): rows per frame
+
+    Returns:
+        list of result dicts
+    """
+
+    results = []
+    for n_files in sizes:
+        for case in ['pd.concat', 'concat_frames']:
+            queue = multiprocessing.Queue()
+            proc = multiprocessing.Process(target=_measure,
+                                           args=(case, n_files, n_rows,
+                                                 queue))
+            proc.start()
+            seconds, peak = queue.get()
+            proc.join()
+            results += [{'benchmark': 'concat', 'case': case, 'n': n_files,
+                         'seconds': seconds, 'peak MB': peak}]
+
+    return results
+
+
+if __name__ == '__main__':
+    sizes = [int(f) for f in sys.argv[1:]] or [100, 1000]
+    print(pd.DataFrame(run(sizes)).to_string(index=False))
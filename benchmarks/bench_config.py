@@ -0,0 +1,64 @@
+############################################################################
+# bench_config.py
+#
+#   Time ConfigFile construction and first access of a few keys for
+#   synthetic ini files, and Dir2HTML on a synthetic tree
+#
+#   usage: python benchmarks/bench_config.py [n_sections ...]
+#
+############################################################################
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+osjoin = os.path.join
+DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.abspath(osjoin(DIR, '..')))
+from fivecentfileio import ConfigFile, Dir2HTML
+import synthetic
+
+
+def run(sizes=(10, 100), n_keys=40, n_files=(500,), tmp=None):
+    """
+    Time ConfigFile and Dir2HTML
+
+    Args:
+        sizes (tuple): numbers of config sections
+        n_keys (int): keys per config section
+        n_files (tuple): numbers of files in the Dir2HTML tree
+        tmp (None|str): directory for the test files
+
+    Returns:
+        list of result dicts
+    """
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=tmp) as tmp:
+        for n in sizes:
+            filename = synthetic.make_config(osjoin(tmp, 'config_%s.ini' % n),
+                                             n, n_keys)
+            for case in ['load', 'load + 3 keys', 'reload']:
+                start = time.perf_counter()
+                config = ConfigFile(filename)
+                if case != 'load':
+                    section = config.config_dict['Section0']
+                    for key in ['key0', 'key1', 'key2']:
+                        section[key]
+                results += [{'benchmark': 'ConfigFile', 'case': case,
+                             'n': n, 'seconds': time.perf_counter() - start}]
+
+        for n in n_files:
+            path = osjoin(tmp, 'html_%s' % n)
+            synthetic.make_tree(path, n, n_rows=1)
+            start = time.perf_counter()
+            Dir2HTML(path, ext='csv')
+            results += [{'benchmark': 'Dir2HTML', 'case': 'scan + ul',
+                         'n': n, 'seconds': time.perf_counter() - start}]
+
+    return results
+
+
+if __name__ == '__main__':
+    sizes = [int(f) for f in sys.argv[1:]] or [10, 100]
+    print(pd.DataFrame(run(sizes)).to_string(index=False))
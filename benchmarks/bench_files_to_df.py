@@ -0,0 +1,87 @@
+############################################################################
+# bench_files_to_df.py
+#
+#   Benchmark FileReader.files_to_df against the original iterrows/.loc
+#   implementation
+#
+#   usage: python benchmarks/bench_files_to_df.py [n_files ...]
+#
+############################################################################
+import os
+import sys
+import time
+import pandas as pd
+osjoin = os.path.join
+DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.abspath(osjoin(DIR, '..')))
+from fivecentfileio import FileReader
+from fivecentfileio import utilities as util
+
+
+def files_to_df_legacy(fr):
+    """
+    Original files_to_df (row-by-row parse and per-cell .loc writes)
+    """
+
+    fr.file_df = pd.DataFrame({'Filepath': fr.file_list})
+    if len(fr.file_list) > 0:
+        fr.file_df['Folder'] = \
+            fr.file_df.Filepath.apply(
+                   lambda x: os.sep.join(x.split(os.sep)[0:-1]))
+        fr.file_df['Filename'] = \
+            fr.file_df.Filepath.apply(lambda x: x.split(os.sep)[-1])
+        fr.file_df['ext'] = \
+            fr.file_df.Filename.apply(lambda x: os.path.splitext(x)[-1])
+
+    for irow, row in fr.file_df.iterrows():
+        split_vals = fr.parse_filename(row['Filename'])
+        for k, v in split_vals.items():
+            try:
+                fr.file_df.loc[irow, k] = \
+                    util.str_2_dtype(v, ignore_list=True)
+            except:
+                fr.file_df.loc[irow, k] = \
+                    str(util.str_2_dtype(v, ignore_list=True))
+
+    return fr
+
+
+def make_file_list(n_files):
+    """
+    Fake file paths with tag-encoded names (no files are written)
+    """
+
+    return [osjoin('data', 'lot%s' % (i % 7),
+                   'Test_Lot=L%s_Wafer=%s_Die=%s_T=25C.csv'
+                   % (i % 7, i % 25, i))
+            for i in range(n_files)]
+
+
+def run(sizes=(1000, 10000)):
+    """
+    Time both implementations
+
+    Args:
+        sizes (tuple): numbers of files to benchmark
+
+    Returns:
+        list of result dicts
+    """
+
+    results = []
+    for n_files in sizes:
+        fr = FileReader(make_file_list(n_files), read=False, verbose=False)
+        for name, func in [('legacy', files_to_df_legacy),
+                           ('vectorized', FileReader.files_to_df)]:
+            start = time.perf_counter()
+            func(fr)
+            results += [{'benchmark': 'files_to_df', 'case': name,
+                         'n': n_files,
+                         'seconds': time.perf_counter() - start}]
+
+    return results
+
+
+if __name__ == '__main__':
+    sizes = [int(f) for f in sys.argv[1:]] or [1000, 10000]
+    print(pd.DataFrame(run(sizes)).to_string(index=False))
@@ -0,0 +1,73 @@
+############################################################################
+# bench_parse.py
+#
+#   Time str_2_dtype, meta_length and read_data on synthetic values and
+#   files with a meta section
+#
+#   usage: python benchmarks/bench_parse.py [n ...]
+#
+############################################################################
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+osjoin = os.path.join
+DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.abspath(osjoin(DIR, '..')))
+from fivecentfileio import utilities as util
+import synthetic
+
+
+def run(sizes=(10000, 100000), meta_lines=(10, 1000), tmp=None):
+    """
+    Time the parsing utilities
+
+    Args:
+        sizes (tuple): numbers of values for str_2_dtype and data rows for
+            meta_length/read_data
+        meta_lines (tuple): meta section lengths for meta_length/read_data
+        tmp (None|str): directory for the test files
+
+    Returns:
+        list of result dicts
+    """
+
+    results = []
+    for n in sizes:
+        values = synthetic.make_values(n)
+        start = time.perf_counter()
+        for value in values:
+            util.str_2_dtype(value)
+        seconds = time.perf_counter() - start
+        results += [{'benchmark': 'str_2_dtype', 'case': 'mixed', 'n': n,
+                     'seconds': seconds, 'values/s': n / seconds}]
+
+    with tempfile.TemporaryDirectory(dir=tmp) as tmp:
+        for n in sizes:
+            for lines in meta_lines:
+                for compression in [None, 'gz']:
+                    path = osjoin(tmp, '%s_%s_%s' % (n, lines, compression))
+                    filename = synthetic.make_tree(
+                        path, 1, n_rows=n, meta_lines=lines,
+                        compression=compression, n_dirs=1)[0]
+                    case = '%s meta lines%s' % (
+                        lines, ' gzip' if compression else '')
+                    for name, func in [
+                            ('meta_length',
+                             lambda: util.meta_length(filename)),
+                            ('read_data',
+                             lambda: util.read_data(filename,
+                                                    data_key='[DATA]'))]:
+                        start = time.perf_counter()
+                        func()
+                        results += [{'benchmark': name, 'case': case,
+                                     'n': n,
+                                     'seconds': time.perf_counter() - start}]
+
+    return results
+
+
+if __name__ == '__main__':
+    sizes = [int(f) for f in sys.argv[1:]] or [10000, 100000]
+    print(pd.DataFrame(run(sizes)).to_string(index=False))
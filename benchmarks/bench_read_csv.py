@@ -0,0 +1,72 @@
+############################################################################
+# bench_read_csv.py
+#
+#   Parse throughput of utilities.read_csv for each csv engine
+#
+#   usage: python benchmarks/bench_read_csv.py [n_rows ...]
+#
+############################################################################
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+osjoin = os.path.join
+DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.abspath(osjoin(DIR, '..')))
+from fivecentfileio import utilities as util
+
+
+def make_csv(filename, n_rows, n_cols=20):
+    """
+    Write a csv of random floats, ints and a string column
+    """
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(n_rows, n_cols)),
+                      columns=['Col%s' % i for i in range(n_cols)])
+    df['Int'] = rng.integers(0, 1000, n_rows)
+    df['Name'] = rng.choice(['Coheed', 'Jane', 'Sue'], n_rows)
+    df.to_csv(filename, index=False)
+
+
+def run(sizes=(100000, 1000000), engines=('c', 'python', 'pyarrow', 'auto'),
+        tmp=None):
+    """
+    Time read_csv for each engine
+
+    Args:
+        sizes (tuple): numbers of rows to benchmark
+        engines (tuple): engines passed to read_csv (pyarrow is skipped
+            when not installed)
+        tmp (None|str): directory for the test files
+
+    Returns:
+        list of result dicts
+    """
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=tmp) as tmp:
+        for n_rows in sizes:
+            filename = osjoin(tmp, 'bench_%s.csv' % n_rows)
+            make_csv(filename, n_rows)
+            size = os.path.getsize(filename) / 1e6
+            for engine in engines:
+                if engine == 'pyarrow' and util.pyarrow is None:
+                    continue
+                if engine == 'python' and n_rows > 100000:
+                    continue
+                start = time.perf_counter()
+                util.read_csv(filename, engine=engine)
+                seconds = time.perf_counter() - start
+                results += [{'benchmark': 'read_csv', 'case': engine,
+                             'n': n_rows, 'seconds': seconds,
+                             'MB/s': size / seconds}]
+
+    return results
+
+
+if __name__ == '__main__':
+    sizes = [int(f) for f in sys.argv[1:]] or [100000, 1000000]
+    print(pd.DataFrame(run(sizes)).to_string(index=False))
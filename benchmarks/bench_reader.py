@@ -0,0 +1,68 @@
+############################################################################
+# bench_reader.py
+#
+#   Time the scan, read, tag and concat stages of FileReader on synthetic
+#   trees of plain csv files, files with a meta section and gzip files
+#
+#   usage: python benchmarks/bench_reader.py [n_files ...]
+#
+############################################################################
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+osjoin = os.path.join
+DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.abspath(osjoin(DIR, '..')))
+from fivecentfileio import FileReader
+from fivecentfileio import utilities as util
+import synthetic
+
+
+VARIANTS = [('plain', {}, {}),
+            ('meta', {'meta_lines': 20},
+             {'read_func': util.read_data, 'data_key': '[DATA]'}),
+            ('meta gzip', {'meta_lines': 20, 'compression': 'gz'},
+             {'read_func': util.read_data, 'data_key': '[DATA]'})]
+
+
+def run(sizes=(200, 1000), n_rows=100, tmp=None):
+    """
+    Time FileReader for each variant
+
+    Args:
+        sizes (tuple): numbers of files to benchmark
+        n_rows (int): data rows per file
+        tmp (None|str): directory for the test files
+
+    Returns:
+        list of result dicts
+    """
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=tmp) as tmp:
+        for n_files in sizes:
+            for name, tree, kwargs in VARIANTS:
+                path = osjoin(tmp, '%s_%s' % (name.replace(' ', '_'),
+                                              n_files))
+                synthetic.make_tree(path, n_files, n_rows, **tree)
+                start = time.perf_counter()
+                fr = FileReader(path, verbose=False, **kwargs)
+                seconds = time.perf_counter() - start
+                for stage in ['scan', 'read', 'tags', 'concat']:
+                    results += [{'benchmark': 'FileReader',
+                                 'case': '%s %s' % (name, stage),
+                                 'n': n_files,
+                                 'seconds': fr.timings[stage]}]
+                results += [{'benchmark': 'FileReader',
+                             'case': '%s total' % name, 'n': n_files,
+                             'seconds': seconds,
+                             'files/s': n_files / seconds}]
+
+    return results
+
+
+if __name__ == '__main__':
+    sizes = [int(f) for f in sys.argv[1:]] or [200, 1000]
+    print(pd.DataFrame(run(sizes)).to_string(index=False))
@@ -0,0 +1,98 @@
+############################################################################
+# bench_write_data.py
+#
+#   Compare utilities.write_data for each compression format against the
+#   original gzip write path
+#
+#   usage: python benchmarks/bench_write_data.py [n_rows ...]
+#
+############################################################################
+import gzip
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+osjoin = os.path.join
+DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.abspath(osjoin(DIR, '..')))
+from fivecentfileio import utilities as util
+
+
+def write_data_legacy(filename, df, meta, data_key='[DATA]'):
+    """
+    Original gzip write path (meta, separator and data written as three
+    separate gzip members)
+    """
+
+    meta.T.to_csv(filename, mode='w', header=False, compression='gzip')
+    with gzip.open(filename, 'at') as output:
+        output.write('%s\n' % data_key)
+    df.to_csv(filename, index=False, mode='a', compression='gzip')
+
+
+def make_data(n_rows, n_cols=20):
+    """
+    Random data and a small meta section
+    """
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(n_rows, n_cols)),
+                      columns=['Col%s' % i for i in range(n_cols)])
+    meta = pd.DataFrame({'Meta%s' % i: [i] for i in range(10)})
+
+    return df, meta
+
+
+def run(sizes=(20000,), tmp=None):
+    """
+    Time write_data for each available compression
+
+    Args:
+        sizes (tuple): numbers of rows to benchmark
+        tmp (None|str): directory for the test files
+
+    Returns:
+        list of result dicts
+    """
+
+    cases = [('legacy gzip', '.csv.gz', {}), ('gzip', '.csv.gz', {}),
+             ('none', '.csv', {}), ('bz2', '.csv.bz2', {}),
+             ('xz', '.csv.xz', {})]
+    if util.zstandard is not None:
+        cases += [('zstd', '.csv.zst', {}),
+                  ('zstd threads=-1', '.csv.zst', {'threads': -1})]
+    if util.lz4 is not None:
+        cases += [('lz4', '.csv.lz4', {})]
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=tmp) as tmp:
+        for n_rows in sizes:
+            df, meta = make_data(n_rows)
+            raw = None
+            for name, ext, kwargs in cases:
+                filename = osjoin(tmp, 'bench' + ext)
+                if os.path.exists(filename):
+                    os.remove(filename)
+                start = time.perf_counter()
+                if name == 'legacy gzip':
+                    write_data_legacy(filename, df, meta)
+                else:
+                    util.write_data(filename, df, meta, **kwargs)
+                seconds = time.perf_counter() - start
+                size = os.path.getsize(filename) / 1e6
+                raw = size if name == 'none' else raw
+                results += [{'benchmark': 'write_data', 'case': name,
+                             'n': n_rows, 'seconds': seconds, 'MB': size}]
+
+            for result in results:
+                if result['n'] == n_rows:
+                    result['ratio'] = raw / result['MB']
+
+    return results
+
+
+if __name__ == '__main__':
+    sizes = [int(f) for f in sys.argv[1:]] or [20000]
+    print(pd.DataFrame(run(sizes)).to_string(index=False))
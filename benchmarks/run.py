@@ -0,0 +1,136 @@
+############################################################################
+# run.py
+#
+#   Run every benchmarks/bench_*.py suite, save the results as json and
+#   compare them with a previous run
+#
+#   usage: python benchmarks/run.py [-o results.json] [-c baseline.json]
+#                                   [-r repeat] [-q] [suite ...]
+#
+#   ex. compare the working tree with a base commit checked out in a
+#   separate worktree:
+#       git worktree add ../base HEAD~1
+#       python ../base/benchmarks/run.py -o base.json
+#       python benchmarks/run.py -c base.json
+#       git worktree remove ../base
+#
+############################################################################
+import argparse
+import glob
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import pandas as pd
+osjoin = os.path.join
+DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, DIR)
+KEYS = ['benchmark', 'case', 'n']
+# Smaller problem sizes for a quick check (-q)
+QUICK = {'bench_concat': {'sizes': (100,)},
+         'bench_config': {'sizes': (10,), 'n_files': (100,)},
+         'bench_files_to_df': {'sizes': (1000,)},
+         'bench_parse': {'sizes': (10000,)},
+         'bench_read_csv': {'sizes': (100000,)},
+         'bench_reader': {'sizes': (200,)},
+         'bench_write_data': {'sizes': (5000,)}}
+
+
+def commit():
+    """
+    Current git commit of the repo (None if git is not available)
+    """
+
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=DIR, stderr=subprocess.DEVNULL) \
+            .decode().strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline):
+    """
+    Compare the seconds of two runs
+
+    Args:
+        results (list): result dicts of this run
+        baseline (list): result dicts of the run to compare with
+
+    Returns:
+        pd.DataFrame of the seconds of both runs for each case of this run
+        and their ratio (speedup > 1 means this run is faster)
+    """
+
+    new = pd.DataFrame(results)[KEYS + ['seconds']]
+    old = pd.DataFrame(baseline)[KEYS + ['seconds']]
+    df = pd.merge(old, new, on=KEYS, how='right', suffixes=(' base', ''))
+    df['speedup'] = df['seconds base'] / df['seconds']
+
+    return df
+
+
+def run(suites=None, repeat=1, quick=False):
+    """
+    Run the benchmark suites
+
+    Args:
+        suites (None|list): names of the suites to run (ex. "bench_parse");
+            default is every bench_*.py file
+        repeat (int): number of runs of each suite (the fastest time of
+            each case is kept)
+        quick (bool): use the smaller sizes in QUICK
+
+    Returns:
+        list of result dicts
+    """
+
+    if not suites:
+        suites = sorted([os.path.splitext(os.path.basename(f))[0]
+                         for f in glob.glob(osjoin(DIR, 'bench_*.py'))])
+
+    results = {}
+    for suite in suites:
+        module = importlib.import_module(suite)
+        kwargs = QUICK.get(suite, {}) if quick else {}
+        for i in range(repeat):
+            for result in module.run(**kwargs):
+                key = tuple(result[k] for k in KEYS)
+                if key not in results \
+                        or result['seconds'] < results[key]['seconds']:
+                    results[key] = result
+
+    return list(results.values())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the benchmarks')
+    parser.add_argument('suites', nargs='*',
+                        help='suites to run (default: all bench_*.py)')
+    parser.add_argument('-o', '--output', help='save the results as json')
+    parser.add_argument('-c', '--compare',
+                        help='json results of a previous run to compare')
+    parser.add_argument('-r', '--repeat', type=int, default=1,
+                        help='runs of each suite (fastest is kept)')
+    parser.add_argument('-q', '--quick', action='store_true',
+                        help='smaller problem sizes')
+    args = parser.parse_args()
+
+    results = run(args.suites, args.repeat, args.quick)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'commit': commit(),
+                       'python': platform.python_version(),
+                       'pandas': pd.__version__,
+                       'platform': platform.platform(),
+                       'results': results}, output, indent=1, default=str)
+
+    if args.compare:
+        with open(args.compare, 'r') as input:
+            baseline = json.load(input)['results']
+        print(compare(results, baseline).to_string(index=False))
+    else:
+        print(pd.DataFrame(results).to_string(index=False))
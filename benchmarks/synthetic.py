@@ -0,0 +1,114 @@
+############################################################################
+# synthetic.py
+#
+#   Synthetic data trees, config files and values for the benchmarks
+#
+############################################################################
+import os
+import sys
+import numpy as np
+import pandas as pd
+osjoin = os.path.join
+DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.abspath(osjoin(DIR, '..')))
+from fivecentfileio import utilities as util
+
+
+def make_tree(path, n_files, n_rows=100, n_cols=10, meta_lines=0,
+              compression=None, n_dirs=10, seed=0):
+    """
+    Write a directory tree of csv files with tag-encoded names
+
+    Files are spread over n_dirs lot folders and named like
+    "Test_Lot=L3_Wafer=12_Die=345_T=25C.csv"
+
+    Args:
+        path (str): top level directory (created if missing)
+        n_files (int): number of files
+        n_rows (int): data rows per file
+        n_cols (int): float columns per file (plus a Die int column)
+        meta_lines (int): lines of "name,value" meta above a [DATA] key
+            (0 = plain csv)
+        compression (None|str): file extension of the compression format
+            (ex. "gz", "zst")
+        n_dirs (int): number of lot folders
+        seed (int): random seed
+
+    Returns:
+        list of file paths
+    """
+
+    rng = np.random.default_rng(seed)
+    columns = ['Col%s' % i for i in range(n_cols)]
+    ext = '.csv' + ('.%s' % compression if compression else '')
+    meta = pd.DataFrame({'Meta%s' % i: ['Value%s' % i if i % 2 else i]
+                         for i in range(meta_lines)})
+
+    files = []
+    for i in range(n_files):
+        folder = osjoin(path, 'lot%s' % (i % n_dirs))
+        os.makedirs(folder, exist_ok=True)
+        filename = osjoin(folder, 'Test_Lot=L%s_Wafer=%s_Die=%s_T=%sC%s'
+                          % (i % n_dirs, i % 25, i, [25, 85][i % 2], ext))
+        df = pd.DataFrame(rng.normal(size=(n_rows, n_cols)), columns=columns)
+        df['Die'] = i
+        if meta_lines > 0:
+            util.write_data(filename, df, meta)
+        else:
+            df.to_csv(filename, index=False)
+        files += [filename]
+
+    return files
+
+
+def make_config(filename, n_sections=50, n_keys=40, seed=0):
+    """
+    Write an ini config file with a mix of value types
+
+    Args:
+        filename (str): path of the ini file
+        n_sections (int): number of sections
+        n_keys (int): keys per section
+        seed (int): random seed
+
+    Returns:
+        filename
+    """
+
+    values = make_values(n_sections * n_keys, seed)
+    with open(filename, 'w') as output:
+        for s in range(n_sections):
+            output.write('[Section%s]\n' % s)
+            for k in range(n_keys):
+                value = values[s * n_keys + k].replace('\n', ' ')
+                output.write('key%s = %s\n' % (k, value))
+            output.write('\n')
+
+    return filename
+
+
+def make_values(n, seed=0):
+    """
+    Strings like those passed to str_2_dtype (numbers, bools, None, plain
+    and quoted strings, lists, dicts, tuples and commented values)
+
+    Args:
+        n (int): number of values
+        seed (int): random seed
+
+    Returns:
+        list of str
+    """
+
+    rng = np.random.default_rng(seed)
+    kinds = rng.integers(0, 10, n)
+    ints = rng.integers(-1000, 1000, n)
+    floats = rng.normal(size=n)
+    values = []
+    for kind, i, f in zip(kinds, ints, floats):
+        values += [[str(i), '%.6g' % f, '%.3e' % f, ['True', 'False'][i % 2],
+                    'None', 'Value%s' % i, '"quoted %s"' % i,
+                    '[%s, %s, "a"]' % (i, f), "{'a': %s, 'b': 'c'}" % i,
+                    '%s # comment' % i][kind]]
+
+    return values
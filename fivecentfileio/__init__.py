@@ -7,6 +7,7 @@ with open(os.path.join(os.path.dirname(__file__), r'version.txt'), 'r') as input
     __version__ = input.readlines()[0]
 __url__       = 'https://github.com/endangeredoxen/fivecentfileio'
 
+from . cache import ReadCache
 from . config import ConfigFile
 from . html import Dir2HTML
 from . reader import FileReader
@@ -0,0 +1,190 @@
+############################################################################
+# cache.py
+#
+#   On-disk cache of parsed data files
+#
+############################################################################
+__author__    = 'Steve Nicholes'
+__copyright__ = 'Copyright (C) 2017 Steve Nicholes'
+__license__   = 'GPLv3'
+__url__       = 'https://github.com/endangeredoxen/fileio'
+
+
+import hashlib
+import os
+import pickle
+import pandas as pd
+import pdb
+try:
+    import pyarrow
+except Exception:
+    pyarrow = None
+osjoin = os.path.join
+st = pdb.set_trace
+
+
+def _ident(value):
+    """
+    Representation of a read_func keyword arg that is the same in every
+    process (functions and classes are named by module and qualname
+    instead of a repr holding their memory address)
+    """
+
+    if type(value) is dict:
+        return sorted([(repr(k), _ident(v)) for k, v in value.items()])
+    if type(value) in [list, tuple, set]:
+        items = [_ident(f) for f in value]
+        return sorted(items) if type(value) is set else items
+    if callable(value):
+        return '%s.%s' % (getattr(value, '__module__', ''),
+                          getattr(value, '__qualname__', type(value).__name__))
+
+    return repr(value)
+
+
+class ReadCache():
+    def __init__(self, path, max_size=2**30):
+        """
+        Persistent cache of the values returned by a FileReader read_func
+
+        Each entry is keyed by the absolute path, size and modified time of
+        the source file plus the read function and its keyword args, so any
+        change to the file or to the way it is read makes a new entry.
+        DataFrames are stored in the feather format when pyarrow is
+        installed (pickle otherwise) and the least recently used entries
+        are evicted once the cache is larger than max_size.
+
+        Args:
+            path (str): cache directory (created if missing)
+            max_size (int): maximum size of the cache directory in bytes
+
+        """
+
+        self.path = path
+        self.max_size = max_size
+
+        os.makedirs(self.path, exist_ok=True)
+
+    def _entry(self, key, ext):
+        """
+        Path to one of the files of a cache entry
+        """
+
+        return osjoin(self.path, key + ext)
+
+    def _write(self, filename, write):
+        """
+        Write a cache file atomically so concurrent readers never see a
+        partial entry
+        """
+
+        temp = '%s.%s.tmp' % (filename, os.getpid())
+        try:
+            write(temp)
+            os.replace(temp, filename)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache is no
+        larger than self.max_size
+        """
+
+        entries = {}
+        for entry in os.scandir(self.path):
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+            key = entry.name.split('.')[0]
+            stat = entry.stat()
+            size, atime = entries.get(key, (0, 0))
+            entries[key] = (size + stat.st_size, max(atime, stat.st_mtime))
+
+        total = sum([f[0] for f in entries.values()])
+        for key in sorted(entries.keys(), key=lambda k: entries[k][1]):
+            if total <= self.max_size:
+                break
+            for ext in ['.feather', '.pkl']:
+                if os.path.exists(self._entry(key, ext)):
+                    os.remove(self._entry(key, ext))
+            total -= entries[key][0]
+
+    def get(self, key):
+        """
+        Load a cache entry
+
+        Args:
+            key (str): entry key from self.key
+
+        Returns:
+            the cached value or None if not found
+        """
+
+        pkl = self._entry(key, '.pkl')
+        feather = self._entry(key, '.feather')
+        try:
+            with open(pkl, 'rb') as input:
+                value = pickle.load(input)
+            if os.path.exists(feather):
+                df = pd.read_feather(feather)
+                value = (df, value[1]) if type(value) is tuple else df
+                os.utime(feather)
+            os.utime(pkl)
+        except Exception:
+            return None
+
+        return value
+
+    def key(self, filename, read_func, kwargs):
+        """
+        Make the cache key of a file read
+
+        Args:
+            filename (str): path to the data file
+            read_func (callable): function used to read the file
+            kwargs (dict): keyword args that change how read_func parses
+                the file
+
+        Returns:
+            str key or None if the file cannot be found
+        """
+
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+
+        ident = repr((os.path.abspath(filename), stat.st_size,
+                      stat.st_mtime_ns, _ident(read_func), _ident(kwargs)))
+
+        return hashlib.sha1(ident.encode('utf-8')).hexdigest()
+
+    def put(self, key, value):
+        """
+        Store the value returned by a read function
+
+        Args:
+            key (str): entry key from self.key
+            value (pd.DataFrame|tuple): DataFrame or (DataFrame, meta)
+
+        """
+
+        df = value[0] if type(value) is tuple else value
+        if type(df) is not pd.DataFrame:
+            return
+
+        if pyarrow is not None and type(df.index) is pd.RangeIndex \
+                and df.index.start == 0 and df.index.step == 1 \
+                and all([type(f) is str for f in df.columns]):
+            try:
+                self._write(self._entry(key, '.feather'), df.to_feather)
+                value = (None, value[1]) if type(value) is tuple else None
+            except Exception:
+                pass
+
+        def _pickle(filename):
+            with open(filename, 'wb') as output:
+                pickle.dump(value, output, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._write(self._entry(key, '.pkl'), _pickle)
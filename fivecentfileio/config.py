@@ -14,9 +14,12 @@ try:
     import configparser
 except:
     import ConfigParser as configparser
+import collections
+import copy
 import os
 oswalk = os.walk
 import pdb
+import threading
 try:
     import win32clipboard
 except Exception:
@@ -24,24 +27,191 @@ except Exception:
 from . import utilities as util
 osjoin = os.path.join
 st = pdb.set_trace
+# Number of config files kept in the process-wide cache
+CONFIG_CACHE_SIZE = 32
+_cache = collections.OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class ConfigSection(dict):
+    def __init__(self, *args, **kwargs):
+        """
+        Dictionary of the values of one config section that are converted
+        with str_2_dtype when first accessed
+
+        Values are stored as the raw strings from the config file and
+        replaced by their converted value on first access.  Values set
+        after construction are stored as is.  Methods that return every
+        value (items, values, ==, repr, ...) convert the whole section.
+
+        Args:
+            same as dict (the values are raw strings)
+
+        """
+
+        dict.__init__(self, *args, **kwargs)
+        self._raw = set(dict.keys(self))
+
+    def __deepcopy__(self, memo):
+        new = ConfigSection()
+        dict.update(new, {k: copy.deepcopy(v, memo)
+                          for k, v in dict.items(self)})
+        new._raw = set(self._raw)
+
+        return new
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._raw.discard(key)
+
+    def __eq__(self, other):
+        self._convert_all()
+        if isinstance(other, ConfigSection):
+            other._convert_all()
+
+        return dict.__eq__(self, other)
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if key in self._raw:
+            value = util.str_2_dtype(value)
+            dict.__setitem__(self, key, value)
+            self._raw.discard(key)
+
+        return value
+
+    def __ior__(self, other):
+        self.update(other)
+
+        return self
+
+    def __iter__(self):
+        # Defined so dict(section) and {**section} use __getitem__ instead
+        #   of copying the raw values
+        return dict.__iter__(self)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __or__(self, other):
+        new = self.copy()
+        new.update(other)
+
+        return new
+
+    def __reduce__(self):
+        return (ConfigSection, (dict(dict.items(self)),),
+                {'_raw': set(self._raw)})
+
+    def __repr__(self):
+        self._convert_all()
+
+        return dict.__repr__(self)
+
+    def __ror__(self, other):
+        self._convert_all()
+
+        return dict.__ror__(self, other)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._raw.discard(key)
+
+    def _convert_all(self):
+        """
+        Convert every raw value of the section
+        """
+
+        for key in list(self._raw):
+            self[key]
+
+    def clear(self):
+        dict.clear(self)
+        self._raw.clear()
+
+    def copy(self):
+        new = ConfigSection()
+        dict.update(new, dict.items(self))
+        new._raw = set(self._raw)
+
+        return new
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+
+        return default
+
+    def items(self):
+        self._convert_all()
+
+        return dict.items(self)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        if len(self) == 0:
+            raise KeyError('popitem(): dictionary is empty')
+        key = next(reversed(dict.keys(self)))
+
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def values(self):
+        self._convert_all()
+
+        return dict.values(self)
+
+
+def clear_cache():
+    """
+    Empty the process-wide cache of parsed config files
+    """
+
+    with _cache_lock:
+        _cache.clear()
 
 
 class ConfigFile():
-    def __init__(self, path=None, paste=False, raw=False, header=False):
+    def __init__(self, path=None, paste=False, raw=False, header=False,
+                 cache=True):
         """
         Config file reader
 
         Reads and parses a config file of the .ini format.  Data types are
         interpreted using str_2_dtype and all parameters are stored in both
         a ConfigParser class and a multi-dimensional dictionary.  "#" is the
-        comment character.
+        comment character.  Each section of the dictionary is a
+        ConfigSection, which converts a value when it is first accessed.
+
+        Config files are kept in a process-wide cache keyed by their
+        absolute path, so constructing the same unchanged file again (same
+        modified time and size) only copies the parsed result.  Use reload
+        to pick up changes to the file of an existing instance.
 
         Args:
             path (str): location of the ini file (default=None)
             paste (bool): allow pasting of a config file from the clipboard
+            cache (bool): use the process-wide cache of parsed files
 
         """
 
+        self.cache = cache
         self.config_path = path
         self.config = configparser.RawConfigParser()
         self.config_dict = {}
@@ -50,24 +220,65 @@ class ConfigFile():
         self.paste = paste
         self.raw = raw
         self.rel_path = os.path.dirname(__file__)
+        self.stamp = None
 
         if self.config_path:
             self.validate_file_path()
         if self.is_valid:
-            self.read_file()
+            self._load()
         elif self.paste:
             self.read_pasted()
+            self.make_dict()
         elif self.raw is not False:
             self.read_raw()
+            self.make_dict()
         else:
             raise ValueError('Could not find a config.ini file at the '
                              'following location: %s' % self.config_path)
 
-        self.make_dict()
-
         if header:
             self.get_header()
 
+    def _load(self, force=False):
+        """
+        Parse the config file or copy it from the process-wide cache
+
+        Args:
+            force (bool): parse the file even if the cache is current
+
+        """
+
+        key = os.path.abspath(self.config_path)
+        stat = os.stat(self.config_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        entry = None
+        if self.cache and not force:
+            with _cache_lock:
+                entry = _cache.get(key)
+                if entry is not None and entry[0] == stamp:
+                    _cache.move_to_end(key)
+                else:
+                    entry = None
+
+        if entry is not None:
+            self.config = copy.deepcopy(entry[1])
+            self.config_dict = copy.deepcopy(entry[2])
+        else:
+            self.config = configparser.RawConfigParser()
+            self.read_file()
+            self.make_dict()
+            if self.cache and CONFIG_CACHE_SIZE > 0:
+                entry = (stamp, copy.deepcopy(self.config),
+                         copy.deepcopy(self.config_dict))
+                with _cache_lock:
+                    _cache[key] = entry
+                    _cache.move_to_end(key)
+                    while len(_cache) > CONFIG_CACHE_SIZE:
+                        _cache.popitem(last=False)
+
+        self.stamp = stamp
+
     def get_header(self):
         """
         Read any comment lines above the first section and call it a header
@@ -89,9 +300,9 @@ class ConfigFile():
     def make_dict(self):
         """
         Convert the configparser object into a dictionary for easier handling
+        (values are converted by str_2_dtype on first access)
         """
-        self.config_dict = {s:{k: util.str_2_dtype(v)
-                            for k, v in self.config.items(s)}
+        self.config_dict = {s: ConfigSection(self.config.items(s))
                             for s in self.config.sections()}
 
     def read_file(self):
@@ -117,6 +328,30 @@ class ConfigFile():
 
         self.config.read_string(self.raw)
 
+    def reload(self, force=False):
+        """
+        Read the config file again if it changed on disk since it was loaded
+
+        Changes made to config_dict are discarded when the file is read
+
+        Args:
+            force (bool): read the file even if it did not change
+
+        Returns:
+            True if the config was read again
+        """
+
+        if not self.is_valid:
+            return False
+
+        stat = os.stat(self.config_path)
+        if not force and (stat.st_mtime_ns, stat.st_size) == self.stamp:
+            return False
+
+        self._load(force=force)
+
+        return True
+
     def validate_file_path(self):
         """
         Make sure there is a valid config file at the location specified by
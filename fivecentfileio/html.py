@@ -54,6 +54,8 @@ class Dir2HTML():
                 the UL
             rst_css (str): path to css file for rst files
             show_ext (bool): show/hide file extension in the file list
+            workers (int): number of threads used to list directories
+                (helps on high-latency network file systems)
 
         Returns:
 
@@ -73,6 +75,7 @@ class Dir2HTML():
         self.show_ext = kwargs.get('show_ext', False)
         self.ul = '<ul>'
         self.use_relative = kwargs.get('use_relative', True)
+        self.workers = kwargs.get('workers', 1)
 
         self.ext = ext
         if self.ext is not None and type(self.ext) is not list:
@@ -208,7 +211,8 @@ class Dir2HTML():
         else:
             # Walk the base_path to identify all the files for the report
             self.files = []
-            for dirName, subdirList, fileList in oswalk(self.base_path):
+            for dirName, subdirList, fileList in \
+                    util.scan_dir(self.base_path, workers=self.workers):
                 if self.ext is not None:
                     fileList = [f for f in fileList
                                 if f.split('.')[-1].lower() in self.ext]
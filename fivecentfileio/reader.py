@@ -17,18 +17,82 @@ except:
 import re
 import os
 oswalk = os.walk
+from concurrent import futures
+import numpy as np
 import pandas as pd
 import pdb
 import sys
 import textwrap
+import time
 from . import utilities as util
 try:
     import win32clipboard
 except Exception:
     pass
+try:
+    import resource
+except Exception:
+    resource = None
 from . import utilities as util
+from . cache import ReadCache
 osjoin = os.path.join
 st = pdb.set_trace
+FILE_ID = '__file_id__'
+# FileReader options that do not change how read_func parses a file (left
+#   out of the ReadCache key)
+READER_KWARGS = ['cache_dir', 'cache_size', 'categorical', 'concat',
+                 'concat_low_memory', 'contains', 'contains_OR', 'counter',
+                 'exact', 'exclude', 'executor', 'ext', 'gui',
+                 'include_filename', 'join_tags', 'labels', 'line_len',
+                 'manifest', 'meta2df', 'mod_time', 'query', 'read',
+                 'read_func', 'scan', 'schema', 'skip_initial_space',
+                 'split_char', 'split_values', 'tag_char', 'verbose',
+                 'workers']
+READ_ERROR = 'File Read Error:\n\nFilename: "%s"\n\nRead function: "%s".  ' \
+             '\n\nIs the data file valid and uncorrupted? Or do you have ' \
+             'the wrong read function specified?'
+# Messages of the pandas/pyarrow errors raised when a file does not have the
+#   usecols of a schema or its values do not convert to the schema dtypes
+SCHEMA_ERRORS = re.compile(r'Usecols do not match|does not exist in CSV|'
+                           r'invalid literal for|could not convert|'
+                           r'Unable to convert column|cannot safely convert|'
+                           r'has NA values|Cannot convert non-finite')
+
+
+def _is_schema_error(error):
+    """
+    Check if an error raised by read_func is a schema mismatch rather than a
+    file that cannot be parsed
+
+    Args:
+        error (Exception): error raised by read_func
+
+    Returns:
+        True if the error is a schema mismatch
+    """
+
+    if isinstance(error, (pd.errors.ParserError, pd.errors.EmptyDataError,
+                          UnicodeError)):
+        return False
+    if not isinstance(error, (ValueError, KeyError)):
+        return False
+
+    return SCHEMA_ERRORS.search(str(error)) is not None
+
+
+def _timed_read(read_func, filename, kwargs):
+    """
+    Call read_func and time it (module level so it can be sent to a
+    process pool)
+
+    Returns:
+        tuple of (read_func return value, seconds)
+    """
+
+    start = time.perf_counter()
+    value = read_func(filename, **kwargs)
+
+    return value, time.perf_counter() - start
 
 
 class FileReader():
@@ -42,21 +106,59 @@ class FileReader():
             path (str|list): partial path name or list of files
 
         Keyword Args:
+            cache_dir (None|str): directory used to cache the parsed data of
+                each file so later reads of unchanged files skip parsing;
+                default=None (no caching)
+            cache_size (int): maximum size of cache_dir in bytes before the
+                least recently used entries are removed; default=2**30
+            categorical (bool): store the non-numeric file_df columns
+                (Filepath, Folder, Filename, ext and string filename tags)
+                of the concatenated DataFrame as categoricals; default=True
             contains (str|list): search string(s) used to filter the file
                 list; default=''
             concat (bool):  True=concatenate all DataFrames into one |
                 False=return a list of DataFrames; default=True
+            concat_low_memory (bool): concatenate with util.concat_frames,
+                which copies each file into preallocated columns and
+                releases it (slower than pd.concat; only lowers peak memory
+                when the allocator returns freed memory to the OS);
+                default=False
             exact (bool): uses exact matching in filenames if True else regex
+            executor (str|concurrent.futures.Executor): pool type used to
+                read files when workers > 1: "thread" for I/O-bound reads |
+                "process" for parse-heavy read_func (read_func must be
+                picklable) | an existing Executor instance; default="thread"
             gui (bool):  True=use a PyQt4 gui prompt to select files |
                 False=search directories automatically; default=False
+            join_tags (str): how the columns of file_df are added to the data
+                when include_filename=True: "file"=merged into each file's
+                DataFrame | "concat"=each file is tagged with a compact file
+                id and the columns are attached once after concatenation
+                (string columns become categoricals); default="file"
             labels (list|str): adds a special label column to the DataFrame
                 for distinguishing between files
                 list=one entry per DataFrame added in order of self.file_list
                 str=single label added to all files (ex. today's date,
                 username, etc.)
-            meta2df (bool): if True convert meta to concatenated DataFrame
+            manifest (None|str): path to a json file that caches the listing
+                of each scanned directory; directories whose modified time
+                has not changed are not listed again on later scans;
+                default=None
+            meta2df (bool): if True convert meta to a DataFrame with one row
+                per file (the union of the meta names of all files); meta is
+                requested from read_func as records (meta_records=True) and
+                the table is built once after all files are read
+            query (None|str): DataFrame.query expression evaluated on
+                file_df to choose which files are read (see self.query);
+                default=None
             read (bool): read the DataFrames after compiling the file_list
             scan (bool): search subdirectories
+            schema (None|bool|int|dict): read every file with the same
+                columns and dtypes (passed to read_func as usecols and
+                dtype, so read_func must accept pd.read_csv style args):
+                True|int=infer the schema from the first (int) files |
+                dict={column: dtype}; files that do not match are skipped
+                and reported in self.schema_errors; default=None
             split_char (str|list): chars by which to split the filename
             split_values (list): values to extract from the filename based on
                 file_split (ex. Filename='MyData_20151225_Wfr16.txt' -->
@@ -67,6 +169,8 @@ class FileReader():
                 (ex. Filename='MyData_T=25C.txt' --> removes T= and adds 25C
                 to a column named T
             verbose (bool): print file read progress
+            workers (int): number of files to read (and directories to
+                list while scanning) concurrently; default=1
 
         """
 
@@ -76,25 +180,40 @@ class FileReader():
         self.exact = kwargs.get('exact', True)
         self.header = kwargs.get('header', True)
         self.concat = kwargs.get('concat', True)
+        self.concat_low_memory = kwargs.get('concat_low_memory', False)
         self.exclude = kwargs.get('exclude', [])
         self.ext = kwargs.get('ext', '')
         self.gui = kwargs.get('gui', False)
         self.labels = kwargs.get('labels', [])
+        self.manifest = kwargs.get('manifest', None)
         self.meta2df = kwargs.get('meta2df', True)
         self.mod_time = kwargs.get('mod_time', False)
         self.scan = kwargs.get('scan', True)
         self.read = kwargs.get('read', True)
         self.include_filename = kwargs.get('include_filename', True)
+        self.join_tags = kwargs.get('join_tags', 'file')
         self.split_char = kwargs.get('split_char', ['_'])
         self.split_values = kwargs.get('split_values', [])
         self.skip_initial_space = kwargs.get('skip_initial_space', True)
         self.tag_char = kwargs.get('tag_char', '=')
         self.file_df = None
         self.file_list = []
+        self.schema = kwargs.get('schema', None)
+        self.schema_errors = {}
+        self.stats = pd.DataFrame()
+        self.timings = {}
+        self._file_stats = {}
+        self._queries = []
         self.line_len = kwargs.get('line_len', 79)
         self.verbose = kwargs.get('verbose', True)
         self.read_func = kwargs.get('read_func', util.read_csv)
         self.counter = kwargs.get('counter', True)
+        self.cache = None
+        self.cache_dir = kwargs.get('cache_dir', None)
+        self.cache_size = kwargs.get('cache_size', 2**30)
+        self.categorical = kwargs.get('categorical', True)
+        self.executor = kwargs.get('executor', 'thread')
+        self.workers = kwargs.get('workers', 1)
         self.kwargs = kwargs
 
         # Format the contains value
@@ -125,6 +244,14 @@ class FileReader():
         if self.split_values is None:
             self.split_values = []
 
+        # Set up the parse cache
+        if self.cache_dir is not None:
+            self.cache = ReadCache(self.cache_dir, self.cache_size)
+
+        # Filter the files by their file_df values before reading
+        if kwargs.get('query', None) is not None:
+            self._queries += [(kwargs['query'], {})]
+
         # Get the list of data filenames
         self.get_filenames()
 
@@ -132,6 +259,465 @@ class FileReader():
         if self.read:
             self.read_files()
 
+    def _add_file(self, f, temp, meta, file_id=None):
+        """
+        Tag the data of a file read by _iter_read, add it to self.df and
+        self.meta and record its stats
+
+        Args:
+            f (str): file path
+            temp (pd.DataFrame): data read from f
+            meta (None|pd.DataFrame|pd.Series|dict): meta read from f
+            file_id (None|int): file id passed to _add_filename
+        """
+
+        start = time.perf_counter()
+        temp, meta = self._add_filename(f, temp, meta, file_id)
+        stats = self._file_stats[f]
+        stats['tags'] = time.perf_counter() - start
+        stats['shape'] = getattr(temp, 'shape', (np.nan, np.nan))
+
+        self.df += [temp]
+        self._df_files += [f]
+        if meta is not None:
+            self._meta_files[f] = meta
+
+    def _add_filename(self, f, temp, meta, file_id=None):
+        """
+        Add the file path and the filename tags from self.file_df to the
+        data and meta of a single file
+
+        Args:
+            f (str): file path
+            temp (pd.DataFrame): data read from f
+            meta (None|pd.DataFrame|pd.Series|dict): meta read from f
+            file_id (None|int): if not None, only tag the data with this
+                row number of self.file_df and leave the tag join to
+                _join_tags after concatenation
+
+        Returns:
+            tuple of updated (temp, meta)
+        """
+
+        if not self.include_filename:
+            return temp, meta
+
+        if type(meta) is pd.DataFrame or type(meta) is dict:
+            meta['Filepath'] = f
+
+        elif type(meta) is pd.Series:
+            meta.ix['Filepath', :] = f
+
+        if file_id is not None:
+            temp[FILE_ID] = np.int32(file_id)
+            return temp, meta
+
+        temp['Filepath'] = f
+
+        # Join file tags
+        temp = pd.merge(temp, self.file_df, on='Filepath')
+
+        return temp, meta
+
+    def _apply_query(self, expr, filters):
+        """
+        Remove the files that do not pass a query from self.file_df and
+        self.file_list
+
+        Args:
+            expr (None|str): DataFrame.query expression
+            filters (dict): {column: value, list of values or function of
+                the column returning a boolean mask}
+        """
+
+        if len(self.file_df) == 0:
+            return
+
+        if 'Modified Time' not in self.file_df.columns \
+                and ('Modified Time' in filters
+                     or (expr is not None and 'Modified Time' in expr)):
+            self.file_df['Modified Time'] = \
+                [util.get_mtime(f) for f in self.file_df.Filepath]
+
+        mask = pd.Series(True, index=self.file_df.index)
+        if expr is not None:
+            mask &= self.file_df.eval(expr).astype(bool)
+        for col, value in filters.items():
+            if col not in self.file_df.columns:
+                mask &= False
+            elif callable(value):
+                mask &= value(self.file_df[col]).astype(bool)
+            elif type(value) in [list, tuple, set]:
+                mask &= self.file_df[col].isin(value)
+            else:
+                mask &= self.file_df[col] == value
+
+        self.file_df = self.file_df[mask].reset_index(drop=True)
+        self.file_list = list(self.file_df.Filepath)
+
+    def _concat(self):
+        """
+        Combine the per-file DataFrames in self.df and the meta of each file
+        into their final form (with concat_low_memory the per-file frames
+        are released as they are copied into the concatenated DataFrame)
+        """
+
+        start = time.perf_counter()
+        self.meta = list(self._meta_files.values())
+
+        if self.concat_low_memory:
+            concat = util.concat_frames
+        else:
+            concat = lambda frames: pd.concat(frames, axis=0)
+
+        if self.concat and len(self.df) > 0:
+            coded = [f for f in self.df if FILE_ID in f.columns]
+            self.df = [f for f in self.df if FILE_ID not in f.columns]
+            if len(coded) > 0:
+                self.df += [self._join_tags(concat(coded))]
+            self.df = concat(self.df)
+            if self.categorical and self.include_filename:
+                self._to_categorical()
+            if self.meta2df:
+                self.meta = self._meta_table(self.meta)
+
+        self.timings['concat'] = time.perf_counter() - start
+        self._make_stats()
+
+    def _filter_files(self):
+        """
+        Apply the file filters to a file list that was not built by walk_dir
+        """
+
+        try:
+            self.file_list = [f for f in self.file_list if self._match(f)]
+        except:
+            raise ValueError('File name list is malformatted: \n   %s\nIf you '
+                             'passed a path and ' % self.file_list + \
+                             'meant to scan the directory, please set the '
+                             '"scan" parameter to True')
+
+    def _get_executor(self):
+        """
+        Get the executor used to read files concurrently
+
+        Returns:
+            tuple of (executor or None for a serial read, True if the
+            executor was created here and must be shut down after the read)
+        """
+
+        if isinstance(self.executor, futures.Executor):
+            return self.executor, False
+
+        if self.workers is None or self.workers <= 1:
+            return None, False
+
+        if self.executor == 'thread':
+            return futures.ThreadPoolExecutor(self.workers), True
+        elif self.executor == 'process':
+            return futures.ProcessPoolExecutor(self.workers), True
+        else:
+            raise ValueError('Invalid executor "%s": use "thread", "process" '
+                             'or a concurrent.futures.Executor'
+                             % self.executor)
+
+    def _get_file_state(self, files):
+        """
+        Get the modified time and size of each file; the modified time is
+        taken from self.file_df if it was already collected with mod_time
+
+        Args:
+            files (list): file paths
+
+        Returns:
+            dict of {file path: (modified time, size)}
+        """
+
+        mtimes = {}
+        if self.mod_time and self.file_df is not None \
+                and 'Modified Time' in self.file_df.columns:
+            mtimes = dict(zip(self.file_df.Filepath,
+                              self.file_df['Modified Time']))
+
+        return {f: (mtimes[f] if f in mtimes else util.get_mtime(f),
+                    util.get_size(f)) for f in files}
+
+    def _iter_read(self, files):
+        """
+        Read files with self.read_func, serially or concurrently depending on
+        self.workers/self.executor.  Results are always yielded in the order
+        of files and only a small window of reads is kept in flight so
+        memory does not grow with the number of files
+
+        Args:
+            files (list): file paths to read
+
+        Yields:
+            tuple of (position in files, filename, DataFrame, meta or None);
+            files that do not match self.schema are skipped and reported in
+            self.schema_errors
+        """
+
+        self._resolve_schema()
+        kwargs = self._read_kwargs()
+        key_kwargs = {k: v for k, v in kwargs.items()
+                      if k not in READER_KWARGS}
+        executor, shutdown = self._get_executor()
+
+        def _start(i, f):
+            # Returns (position, filename, cache key, future or None, read
+            #   callable returning (value, seconds))
+            key = None
+            if self.cache is not None:
+                start = time.perf_counter()
+                key = self.cache.key(f, self.read_func, key_kwargs)
+                value = self.cache.get(key) if key is not None else None
+                if value is not None:
+                    seconds = time.perf_counter() - start
+                    self._file_stats[f] = {'cached': True}
+                    return i, f, None, None, lambda: (value, seconds)
+            self._file_stats[f] = {'cached': False}
+            if executor is None:
+                return i, f, key, None, \
+                    lambda: _timed_read(self.read_func, f, kwargs)
+            future = executor.submit(_timed_read, self.read_func, f, kwargs)
+            return i, f, key, future, future.result
+
+        def _finish(i, f, key, future, read):
+            try:
+                temp, self._file_stats[f]['read'] = read()
+            except Exception as e:
+                if type(self.schema) is not dict or not _is_schema_error(e):
+                    raise ValueError(READ_ERROR % (f, self.read_func))
+                self.schema_errors[f] = str(e)
+                self._file_stats.pop(f, None)
+                return None
+            except:
+                raise ValueError(READ_ERROR % (f, self.read_func))
+            if key is not None:
+                self.cache.put(key, temp)
+            if type(temp) is tuple:
+                return i, f, temp[0], temp[1]
+            return i, f, temp, None
+
+        if executor is None:
+            window = 1
+        else:
+            window = 2 * max(getattr(executor, '_max_workers', 1),
+                             self.workers)
+        pending = []
+        try:
+            for i, f in enumerate(files):
+                pending += [_start(i, f)]
+                if len(pending) >= window:
+                    result = _finish(*pending.pop(0))
+                    if result is not None:
+                        yield result
+            while len(pending) > 0:
+                result = _finish(*pending.pop(0))
+                if result is not None:
+                    yield result
+            if self.cache is not None:
+                self.cache.evict()
+        finally:
+            for i, f, key, future, read in pending:
+                if future is not None:
+                    future.cancel()
+            if shutdown:
+                executor.shutdown()
+
+    def _join_tags(self, df):
+        """
+        Replace the file id column of a concatenated DataFrame with the
+        columns of self.file_df.  String columns are added as categoricals
+        so each unique file path/tag is only stored once.  Data columns
+        with the name of a tag are kept with the same "_x"/"_y" suffixes as
+        the pd.merge of join_tags="file"
+
+        Args:
+            df (pd.DataFrame): concatenated data with a file id column
+
+        Returns:
+            updated DataFrame
+        """
+
+        ids = df.pop(FILE_ID).to_numpy()
+        clash = [f for f in self.file_df.columns
+                 if f != 'Filepath' and f in df.columns]
+        df = df.rename(columns={f: '%s_x' % f for f in clash})
+        for col in self.file_df.columns:
+            values = self.file_df[col]
+            name = '%s_y' % col if col in clash else col
+            if pd.api.types.is_numeric_dtype(values):
+                df[name] = values.to_numpy()[ids]
+            else:
+                cat = pd.Categorical(values)
+                df[name] = pd.Categorical.from_codes(cat.codes[ids],
+                                                     cat.categories)
+
+        return df
+
+    def _make_matcher(self):
+        """
+        Compile the contains, contains_OR, exclude and ext filters into a
+        single function so each file path is tested in one pass
+
+        Returns:
+            function of a file path that returns True if the file is kept
+        """
+
+        def _pattern(value):
+            if self.exact:
+                return lambda f: value in f
+            return re.compile(value).search
+
+        contains = [_pattern(f) for f in self.contains if f != '']
+        contains_OR = [f for f in self.contains_OR]
+        exclude = [_pattern(f) for f in self.exclude]
+        ext = self.ext
+
+        def match(f):
+            for c in contains:
+                if not c(f):
+                    return False
+            if len(contains_OR) > 0 and not any(c in f for c in contains_OR):
+                return False
+            for exc in exclude:
+                if exc(f):
+                    return False
+            if ext != '' and os.path.splitext(f)[-1] not in ext:
+                return False
+            return True
+
+        return match
+
+    def _make_stats(self):
+        """
+        Build self.stats from the stats recorded for each file of the last
+        read
+        """
+
+        stats = self._file_stats
+        self.stats = pd.DataFrame({
+            'Filepath': list(stats.keys()),
+            'Size': [self._file_state[f][1] for f in stats],
+            'Cached': [f['cached'] for f in stats.values()],
+            'Read Time': [f['read'] for f in stats.values()],
+            'Tag Time': [f['tags'] for f in stats.values()],
+            'Rows': [f['shape'][0] for f in stats.values()],
+            'Columns': [f['shape'][1] for f in stats.values()]})
+        self.stats['MB/s'] = self.stats['Size'] / 1e6 / self.stats['Read Time']
+        self.timings['tags'] = float(self.stats['Tag Time'].sum())
+
+    def _meta_table(self, meta):
+        """
+        Build the meta DataFrame from the meta of each file in one step
+
+        Args:
+            meta (list): meta of each file as dicts (records) or DataFrames
+                and Series from custom read functions
+
+        Returns:
+            pd.DataFrame with one row per meta record
+        """
+
+        records = []
+        for m in meta:
+            if type(m) is dict:
+                records += [m]
+            elif type(m) is pd.DataFrame:
+                records += m.to_dict('records')
+            elif type(m) is pd.Series:
+                records += [m.to_dict()]
+
+        return pd.DataFrame(records)
+
+    def _prune(self, path):
+        """
+        Check if a directory can be skipped while scanning because every
+        file below it would be excluded
+
+        Args:
+            path (str): directory path
+
+        Returns:
+            True to skip the directory
+        """
+
+        if self.exact:
+            return any(exc in path for exc in self.exclude)
+
+        # a regex that matches the directory path may not match every file
+        #   below it, so only skip directories whose name contains the text
+        name = os.path.basename(path)
+        return any(exc in name for exc in self.exclude)
+
+    def _read_kwargs(self):
+        """
+        Build the keyword args passed to self.read_func
+
+        A fresh dict is made for every read so self.kwargs is never mutated
+        while files are being read (safe for concurrent reads)
+
+        Returns:
+            dict of keyword args
+        """
+
+        kwargs = {k: v for k, v in self.kwargs.items()
+                  if k not in ['cache_dir', 'cache_size', 'concat_low_memory',
+                               'executor', 'workers']}
+        kwargs['verbose'] = False
+        if self.meta2df and self.concat:
+            kwargs['meta_records'] = True
+        if type(self.schema) is dict:
+            kwargs['usecols'] = list(self.schema.keys())
+            kwargs['dtype'] = dict(self.schema)
+
+        return kwargs
+
+    def _resolve_schema(self):
+        """
+        Replace a schema of True|int with the schema inferred from the first
+        files of self.file_list (no-op for None, False or a dict)
+        """
+
+        if self.schema is not None and self.schema is not False \
+                and type(self.schema) is not dict:
+            self.schema = self.infer_schema(int(self.schema))
+
+    def _to_categorical(self):
+        """
+        Store the non-numeric file_df columns (Filepath, Folder, Filename,
+        ext and string filename tags) of the concatenated self.df as
+        categoricals
+        """
+
+        for col in self.file_df.columns:
+            if col not in self.df.columns \
+                    or pd.api.types.is_numeric_dtype(self.df[col]) \
+                    or isinstance(self.df[col].dtype, pd.CategoricalDtype):
+                continue
+            self.df[col] = self.df[col].astype('category')
+
+    def _tag_dtype(self, values):
+        """
+        Convert a column of filename tag values to its data type
+
+        Args:
+            values (pd.Series): tag values from parse_filename
+
+        Returns:
+            converted pd.Series; container types are stored as str so they
+            fit in a single DataFrame cell
+        """
+
+        values = util.series_2_dtype(values, ignore_list=True, unify=False)
+        containers = values.map(type).isin([dict, list, tuple])
+        if containers.any():
+            values[containers] = values[containers].map(str)
+
+        return values.infer_objects()
+
     def files_to_df(self):
         """
         Method to convert file list too DataFrame
@@ -143,28 +729,26 @@ class FileReader():
         """
         # Make a DataFrame of the file paths and names
         self.file_df = pd.DataFrame({'Filepath': self.file_list})
-        if len(self.file_list) > 0:
-            self.file_df['Folder'] = \
-                self.file_df.Filepath.apply(
-                       lambda x: os.sep.join(x.split(os.sep)[0:-1]))
-            self.file_df['Filename'] = \
-                self.file_df.Filepath.apply(lambda x: x.split(os.sep)[-1])
-            self.file_df['ext'] = \
-                self.file_df.Filename.apply(lambda x: os.path.splitext(x)[-1])
-            if self.mod_time:
-                self.file_df['Modified Time'] = \
-                    self.file_df['Filepath'].apply(lambda x: util.get_mtime(x))
-
-        # Add split values
-        for irow, row in self.file_df.iterrows():
-            split_vals = self.parse_filename(row['Filename'])
-            for k, v in split_vals.items():
-                try:
-                    self.file_df.loc[irow, k] = \
-                        util.str_2_dtype(v, ignore_list=True)
-                except:
-                    self.file_df.loc[irow, k] = \
-                        str(util.str_2_dtype(v, ignore_list=True))
+        if len(self.file_list) == 0:
+            return self
+
+        paths = self.file_df.Filepath.str.rpartition(os.sep)
+        self.file_df['Folder'] = paths[0]
+        self.file_df['Filename'] = paths[2]
+        self.file_df['ext'] = \
+            self.file_df.Filename.str.extract(r'^\.*[^.].*(\.[^.]*)$',
+                                              expand=False).fillna('')
+        if self.mod_time:
+            self.file_df['Modified Time'] = \
+                [util.get_mtime(f) for f in self.file_list]
+
+        # Add split values (parsed once per file and converted a column at
+        #   a time)
+        tags = pd.DataFrame.from_records(
+            [self.parse_filename(f) for f in self.file_df.Filename],
+            index=self.file_df.index)
+        for col in tags.columns:
+            self.file_df[col] = self._tag_dtype(tags[col])
 
         return self
 
@@ -177,17 +761,22 @@ class FileReader():
             reset (bool): set file list to empty if True else files are re-appended
         """
 
+        start = time.perf_counter()
         self.file_list = [] if reset else self.file_list
+        self._match = self._make_matcher()
 
         # Gui option
         if self.gui:
             self.gui_search()
+            self._filter_files()
 
         # If list of files is passed to FileReader with no scan option
         elif type(self.path) is list and self.scan != False:
             self.file_list = self.path
+            self._filter_files()
 
         # If list of files is passed to FileReader with a scan option
+        #   (filters are applied while walking)
         elif type(self.path) is list and self.scan:
             for p in self.path:
                 self.walk_dir(p)
@@ -199,44 +788,14 @@ class FileReader():
         # No scanning - use provided path
         else:
             self.file_list = [self.path]
+            self._filter_files()
 
-        self._allfiles = [e for e in self.file_list]
-
-        # Filter based on self.contains search string
-        for contain in self.contains:
-            if self.exact:
-                self.file_list = [f for f in self.file_list if contain in f]
-            else:
-                pat = re.compile(contain)
-                self.file_list = [f for f in self.file_list if pat.search(f)]
+        self.files_to_df()
 
-        if len(self.contains_OR) > 0:
-            files = []
-            for c in self.contains_OR:
-                files += [f for f in self.file_list if c in f]
-            self.file_list = files
+        for expr, filters in self._queries:
+            self._apply_query(expr, filters)
 
-        # Filter out exclude
-        for exc in self.exclude:
-            if self.exact:
-                self.file_list = [f for f in self.file_list if exc not in f]
-            else:
-                pat = re.compile(exc)
-                self.file_list = \
-                    [f for f in self.file_list if not pat.search(f)]
-
-        # Filter based on self.ext
-        try:
-            if self.ext != '':
-                self.file_list = [f for f in self.file_list
-                                  if os.path.splitext(f)[-1] in self.ext]
-        except:
-            raise ValueError('File name list is malformatted: \n   %s\nIf you '
-                             'passed a path and ' % self.file_list + \
-                             'meant to scan the directory, please set the '
-                             '"scan" parameter to True')
-
-        self.files_to_df()
+        self.timings['scan'] = time.perf_counter() - start
 
         return self
 
@@ -270,6 +829,54 @@ class FileReader():
 
         return self
 
+    def infer_schema(self, n=1):
+        """
+        Infer the columns and dtypes of the data from the first n files of
+        self.file_list (columns whose dtype differs between the sampled
+        files get the common numeric dtype or object)
+
+        Args:
+            n (int): number of files to sample
+
+        Returns:
+            dict of {column: dtype}
+        """
+
+        kwargs = self._read_kwargs()
+        schema = {}
+        for f in self.file_list[0:max(n, 1)]:
+            try:
+                temp = self.read_func(f, **kwargs)
+            except:
+                raise ValueError(READ_ERROR % (f, self.read_func))
+            if type(temp) is tuple:
+                temp = temp[0]
+            for col, dtype in temp.dtypes.items():
+                if col not in schema or schema[col] == dtype:
+                    schema[col] = dtype
+                elif schema[col].kind in 'biuf' and dtype.kind in 'biuf':
+                    schema[col] = np.result_type(schema[col], dtype)
+                else:
+                    schema[col] = np.dtype(object)
+
+        return schema
+
+    def iter_frames(self):
+        """
+        Read the files in self.file_list one at a time without keeping them
+        in memory (self.df and self.meta are not modified)
+
+        Yields:
+            tuple of (row of self.file_df for the file, DataFrame with the
+            filename tags attached, meta or None)
+        """
+
+        for i, f, temp, meta in self._iter_read(self.file_list):
+            if type(meta) is dict and self.meta2df and self.concat:
+                meta = pd.DataFrame([meta])
+            temp, meta = self._add_filename(f, temp, meta)
+            yield self.file_df.iloc[i], temp, meta
+
     def parse_filename(self, filename):
         """
         Parse the filename to retrieve attributes for each file
@@ -324,85 +931,187 @@ class FileReader():
         else:
             return dict(zip(tags, values))
 
-    def read_files(self, **kwargs):
-        """
-        Read the files in self.file_list (assumes all files can be cast into
-        pandas DataFrames)
+    def query(self, expr=None, **filters):
         """
+        Filter the files to read by their values in self.file_df (filename
+        tags, Folder, Filename, ext, Modified Time, ...) so only the
+        matching files are read.  Queries are kept and applied again when
+        the file list is rebuilt (ex. by refresh)
 
-        self.df, self.meta = [], []
+        Ex: FileReader(path, split_values=[None, 'Date', 'Wafer'],
+                       read=False).query('Wafer == 16').read_files()
 
-        for i, f in enumerate(self.file_list):
+        Args:
+            expr (None|str): DataFrame.query expression evaluated on
+                self.file_df (use backticks for column names with spaces,
+                ex. '`Modified Time` > 1.5e9')
+            **filters: column=value pairs where value is a single value, a
+                list of values or a function of the column that returns a
+                boolean mask
 
-            # Read the raw data file
-            try:
-                if self.verbose:
-                    if self.counter:
-                        # Print a file counter
-                        counter = '[%s/%s = %.1f%%]' % (i, len(self.file_list),
-                                                        i/len(self.file_list)*100)
-                        util.print('Reading files', end='', post_text=counter,
-                                   line_len=self.line_len)
-
-                verbose = self.kwargs['verbose'] if 'verbose' in self.kwargs else self.verbose
-                self.kwargs['verbose'] = False
-                temp = self.read_func(f, **self.kwargs)
-                self.kwargs['verbose'] = verbose
-
-                if type(temp) is tuple:
-                    temp, meta = temp
-                else:
-                    meta = None
+        Returns:
+            self (FileReader) reference to self
+        """
 
-            except:
-                raise ValueError('File Read Error:\n\nFilename: "%s"\n\n'
-                                 'Read function: "%s".  \n\nIs the data file '
-                                 'valid and uncorrupted? Or do you have the '
-                                 'wrong read function specified?'
-                                 % (f, self.read_func))
-            # Add filename
-            if self.include_filename:
-                temp['Filepath'] = f
+        self._queries += [(expr, filters)]
+        self._apply_query(expr, filters)
 
-                if type(meta) is pd.DataFrame or type(meta) is dict:
-                    meta['Filepath'] = f
+        return self
+
+    def read_files(self, **kwargs):
+        """
+        Read the files in self.file_list (assumes all files can be cast into
+        pandas DataFrames).  The time, size and shape of each file read are
+        saved in self.stats and the time of each stage in self.timings (see
+        stats_summary)
+        """
 
-                elif type(meta) is pd.Series:
-                    meta.ix['Filepath', :] = f
+        self._file_state = self._get_file_state(self.file_list)
+        self._df_files, self._meta_files = [], {}
+        self._file_stats = {}
+        self.df = []
+        self.schema_errors = {}
+        counter = ''
 
-                # Join file tags
-                temp = pd.merge(temp, self.file_df, on='Filepath')
+        join_tags = self.concat and self.join_tags == 'concat'
+        start = time.perf_counter()
+        for i, f, temp, meta in self._iter_read(self.file_list):
 
+            if self.verbose:
+                if self.counter:
+                    # Print a file counter
+                    counter = '[%s/%s = %.1f%%]' % (i, len(self.file_list),
+                                                    i/len(self.file_list)*100)
+                    util.print('Reading files', end='', post_text=counter,
+                               line_len=self.line_len)
 
-            self.df += [temp]
-            if meta is not None:
-                self.meta += [meta]
+            self._add_file(f, temp, meta, i if join_tags else None)
+
+        self.timings['read'] = time.perf_counter() - start
 
         if self.verbose:
             util.print('Reading files', end='\n',
                        post_text='done!' + ' ' * max(0, len(counter) - 5),
                        line_len=self.line_len)
+            if len(self.schema_errors) > 0:
+                util.print('Schema mismatches', post_text='%s files skipped '
+                           '(see schema_errors)' % len(self.schema_errors),
+                           line_len=self.line_len)
 
-        if self.concat and len(self.df) > 0:
+        if len(self.df) > 0:
             self.temp = temp
-            self.df = pd.concat(self.df, axis=0)
-            if len(self.meta) > 0:
-                self.meta = \
-                    pd.concat(self.meta, axis=1).reset_index(drop=True) \
-                        if self.meta2df else self.meta
-            elif self.meta2df:
-                self.meta = pd.DataFrame()
+        self._concat()
+
+        return self
+
+    def refresh(self):
+        """
+        Re-scan the file search and read only the files that were added or
+        modified (by mtime or size) since the last read.  Rows from deleted
+        or modified files are dropped from self.df/self.meta and the new
+        data is appended at the end
+
+        Returns:
+            self (FileReader) reference to self
+        """
+
+        if not hasattr(self, '_file_state'):
+            self.get_filenames()
+            self.read_files()
+            return self
+
+        if isinstance(self.df, pd.DataFrame) and not self.include_filename:
+            raise ValueError('refresh requires include_filename=True to '
+                             'locate the rows of each file in the '
+                             'concatenated DataFrame')
+
+        old_state = self._file_state
+        self.get_filenames()
+        self._file_state = self._get_file_state(self.file_list)
+        new = [f for f in self.file_list
+               if old_state.get(f) != self._file_state[f]]
+        stale = set([f for f, state in old_state.items()
+                     if self._file_state.get(f) != state])
+
+        if len(new) == 0 and len(stale) == 0:
+            return self
+
+        # Drop the data from deleted or modified files
+        if isinstance(self.df, pd.DataFrame):
+            self.df = [self.df[~self.df.Filepath.isin(stale)]]
+        else:
+            self.df = [df for f, df in zip(self._df_files, self.df)
+                       if f not in stale]
+        self._df_files = [f for f in self._df_files if f not in stale]
+        for f in stale:
+            self._meta_files.pop(f, None)
+            self.schema_errors.pop(f, None)
+
+        # Read the new and modified files
+        file_ids = {f: i for i, f in enumerate(self.file_list)} \
+            if self.concat and self.join_tags == 'concat' else {}
+        self._file_stats = {}
+        start = time.perf_counter()
+        for i, f, temp, meta in self._iter_read(new):
+            self._add_file(f, temp, meta, file_ids.get(f))
+        self.timings['read'] = time.perf_counter() - start
+
+        self._concat()
+
+        return self
+
+    def stats_summary(self):
+        """
+        Summarize the stats of the last read
+
+        Returns:
+            pd.Series of the number of files, total size, time spent in
+            each stage (scan, read, tags and concat), throughput and the
+            peak memory of the process (NaN if not available)
+        """
+
+        size = self.stats['Size'].sum() / 1e6 if len(self.stats) > 0 else 0
+        timings = {k: self.timings.get(k, np.nan)
+                   for k in ['scan', 'read', 'tags', 'concat']}
+        read = timings['read'] + timings['concat']
+
+        peak = np.nan
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak = peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+        return pd.Series({'Files': len(self.stats),
+                          'Cached Files': self.stats['Cached'].sum()
+                          if len(self.stats) > 0 else 0,
+                          'Size (MB)': size,
+                          'Scan Time': timings['scan'],
+                          'Read Time': timings['read'],
+                          'Tag Time': timings['tags'],
+                          'Concat Time': timings['concat'],
+                          'MB/s': size / read if read > 0 else np.nan,
+                          'Files/s': len(self.stats) / read
+                          if read > 0 else np.nan,
+                          'Peak Memory (MB)': peak})
 
     def walk_dir(self, path):
         """
-        Walk through a directory and its subfolders to find file names
+        Walk through a directory and its subfolders to find file names that
+        pass the contains/contains_OR/exclude/ext filters
 
         Args:
             path (str): top level directory
 
         """
 
-        for dir_name, subdir_list, file_list in oswalk(path):
-            for exc in self.exclude:
-                subdir_list[:] = [s for s in subdir_list if exc not in s]
-            self.file_list += [os.path.join(dir_name, f) for f in file_list]
+        manifest = util.read_manifest(self.manifest) \
+            if self.manifest is not None else None
+
+        for dir_name, subdir_list, file_list in \
+                util.scan_dir(path, prune=self._prune, workers=self.workers,
+                              manifest=manifest):
+            self.file_list += [f for f in
+                               [os.path.join(dir_name, f) for f in file_list]
+                               if self._match(f)]
+
+        if self.manifest is not None:
+            util.write_manifest(self.manifest, manifest)
@@ -1,10 +1,31 @@
-import os, sys, pdb
+import os, sys, pdb, random, threading, time
 st = pdb.set_trace
 osjoin, osplit, abspath = os.path.join, os.path.split, os.path.abspath
 DIR = osplit(os.path.realpath(__file__))[0]
 path = abspath('..\..')
 sys.path.insert(0, path) if path not in sys.path else None
 import fileio
+import pandas as pd
+
+
+def _read_csv(filename, **kwargs):
+    _read_csv.calls += 1
+    return pd.read_csv(filename)
+_read_csv.calls = 0
+
+
+def _read_csv_schema(filename, usecols=None, dtype=None, **kwargs):
+    return pd.read_csv(filename, usecols=usecols, dtype=dtype)
+
+
+def _write_csv(path, name, values, rows=1):
+    with open(osjoin(str(path), name), 'w') as output:
+        output.write('Coheed,Jane\n' + '%s,%s\n' % values * rows)
+
+
+def _write_wafers(path, n, rows=1):
+    for i in range(n):
+        _write_csv(path, 'data_Wfr=%s.csv' % i, (i, i * 2), rows)
 
 
 def test_meta_length():
@@ -31,6 +52,10 @@ def test_meta_length():
     lines = fileio.utilities.meta_length(file, max_lines=1)
     assert lines == -1
 
+    # Case not found within the scan limit
+    lines = fileio.utilities.meta_length(file, max_bytes=4)
+    assert lines == -1
+
     # .gzip compressed file tests
 
     # Case found
@@ -51,7 +76,7 @@ def test_meta_length():
     assert lines == -1
 
 
-def test_read_csv():
+def test_read_csv(tmp_path):
 
     # Case of simple csv
     file = osjoin(DIR, 'simple_csv_example.csv')
@@ -73,6 +98,30 @@ def test_read_csv():
     df = fileio.utilities.read_csv(file, sep=';')
     assert df.loc[0, 'Coheed'] == 1
 
+    # Case of auto engine with kwargs that pd.read_csv does not accept
+    for engine in ['auto', 'pyarrow', 'c']:
+        df = fileio.utilities.read_csv(file, sep=';', engine=engine,
+                                       verbose=False, as_recarray=True)
+        assert df.loc[0, 'Coheed'] == 1
+
+    # Case of auto engine keeping the implicit skipinitialspace
+    file = str(tmp_path / 'spaces.csv')
+    with open(file, 'w') as output:
+        output.write('Coheed, Jane, Sue\n1, x, 2\n')
+    for engine in ['auto', 'c']:
+        df = fileio.utilities.read_csv(file, engine=engine)
+        assert list(df.columns) == ['Coheed', 'Jane', 'Sue']
+        assert df.loc[0, 'Jane'] == 'x'
+
+    # Case of formats left to pandas and text that looks like bz2
+    file = str(tmp_path / 'simple.csv.zip')
+    pd.DataFrame({'Coheed': [1]}).to_csv(file, index=False)
+    assert fileio.utilities.read_csv(file).loc[0, 'Coheed'] == 1
+    file = str(tmp_path / 'bzh.csv')
+    with open(file, 'w') as output:
+        output.write('BZh,Jane\n1,2\n')
+    assert fileio.utilities.read_csv(file).loc[0, 'BZh'] == 1
+
 
 def test_read_data():
 
@@ -88,6 +137,11 @@ def test_read_data():
     assert df.loc[0, 'Coheed'] == 1
     assert meta.loc[0, 'Meta1'] == 1
 
+    # Case of data key not found
+    file = osjoin(DIR, 'simple_csv_example.csv.gz')
+    df = fileio.utilities.read_data(file, data_key='[DATA]')
+    assert df.loc[0, 'Coheed'] == 1
+
 
 def test_write_data():
 
@@ -99,13 +153,22 @@ def test_write_data():
     assert meta.loc[0, 'Meta1'] == 1
     os.remove('test.csv')
 
-    file = osjoin(DIR, 'data_key_example.csv')
-    df, meta = fileio.utilities.read_data(file, data_key='[DATA]')
-    fileio.utilities.write_data('test.csv.gz', df, meta, data_key='[DATA]')
-    df, meta = fileio.utilities.read_data('test.csv.gz', data_key='[DATA]')
-    assert df.loc[0, 'Coheed'] == 1
-    assert meta.loc[0, 'Meta1'] == 1
-    os.remove('test.csv.gz')
+    for ext, lib in [('.gz', None), ('.bz2', None), ('.xz', None),
+                     ('.zst', 'zstandard'), ('.lz4', 'lz4')]:
+        if lib is not None and getattr(fileio.utilities, lib) is None:
+            continue
+        file = osjoin(DIR, 'data_key_example.csv')
+        df, meta = fileio.utilities.read_data(file, data_key='[DATA]')
+        fileio.utilities.write_data('test.csv' + ext, df, meta,
+                                    data_key='[DATA]')
+        fileio.utilities.write_data('test.csv' + ext, df)
+        df, meta = fileio.utilities.read_data('test.csv' + ext,
+                                              data_key='[DATA]')
+        assert len(df) == 6
+        assert df.loc[0, 'Coheed'] == 1
+        assert meta.loc[0, 'Meta1'] == 1
+        assert fileio.utilities.meta_length('test.csv' + ext) == 4
+        os.remove('test.csv' + ext)
 
 
 def test_align_values():
@@ -115,3 +178,468 @@ def test_align_values():
     df = fileio.utilities.align_values(df, first_col=0, rjust=True)
     assert df.loc[0, 'Coheed'] == '     1'
 
+
+def test_concat_frames():
+
+    frames = [pd.DataFrame({'a': [1, 2], 'b': ['x', 'y'],
+                            'c': [True, False]}),
+              pd.DataFrame({'a': [1.5], 'd': pd.array([3], dtype='Int64')}),
+              pd.DataFrame({'b': ['z'], 'a': [3]}, index=[7])]
+    expected = pd.concat(frames, axis=0)
+    df = fileio.utilities.concat_frames(list(frames))
+    pd.testing.assert_frame_equal(df, expected)
+
+    # Mixed dtype kinds are promoted like pd.concat
+    frames = [pd.DataFrame({'a': [True, False], 'b': [1.5, 2]}),
+              pd.DataFrame({'a': [3], 'b': [1j]}),
+              pd.DataFrame({'b': [2.5]})]
+    for items in [frames[0:2], frames]:
+        df = fileio.utilities.concat_frames(list(items))
+        pd.testing.assert_frame_equal(df, pd.concat(items, axis=0))
+
+    # Input frames are released
+    frames = [expected.copy(), expected.copy()]
+    fileio.utilities.concat_frames(frames)
+    assert frames == []
+
+
+def test_str_2_dtype():
+
+    def _convert(func, value, ignore_list):
+        try:
+            value = func(value, ignore_list=ignore_list)
+            return type(value), repr(value)
+        except Exception as e:
+            return type(e)
+
+    # Fast path and memo match the full parse on random values
+    rng = random.Random(0)
+    chars = list('0123456789.-+eE Tx_,#[]{}()":\'\\') + \
+        ['None', 'True', 'False', 'inf', 'nan', '\\t']
+    values = [''.join([rng.choice(chars) for i in range(rng.randint(0, 10))])
+              for j in range(20000)]
+    for value in values:
+        for ignore_list in [False, True]:
+            expected = _convert(fileio.utilities._str_2_dtype, value,
+                                ignore_list)
+            assert _convert(fileio.utilities.str_2_dtype, value,
+                            ignore_list) == expected, value
+            assert _convert(fileio.utilities.str_2_dtype, value,
+                            ignore_list) == expected, value
+
+    # Whole columns match the scalar conversion
+    expected = [_convert(fileio.utilities.str_2_dtype, f, False)
+                for f in values]
+    values = [f for f, e in zip(values, expected) if type(e) is tuple]
+    expected = [e for e in expected if type(e) is tuple]
+    converted = fileio.utilities.series_2_dtype(values + [None],
+                                                unify=False)
+    assert [(type(f), repr(f)) for f in converted[0:-1]] == expected
+    assert pd.isnull(converted.iloc[-1])
+    assert fileio.utilities.series_2_dtype(['1', '2']).dtype == 'int64'
+    assert fileio.utilities.series_2_dtype(['1', '2.5', None]).dtype == \
+        'float64'
+    assert fileio.utilities.series_2_dtype(['True', 'False']).dtype == bool
+
+    # Memoized containers are not shared
+    value = fileio.utilities.str_2_dtype('[1, 2]')
+    value += [3]
+    assert fileio.utilities.str_2_dtype('[1, 2]') == [1, 2]
+
+
+def test_read_files_workers(tmp_path):
+
+    _write_wafers(tmp_path, 12)
+
+    serial = fileio.FileReader(str(tmp_path), verbose=False,
+                               read_func=_read_csv)
+    for executor in ['thread', 'process']:
+        fr = fileio.FileReader(str(tmp_path), verbose=False, workers=4,
+                               executor=executor, read_func=_read_csv)
+        assert list(fr.df.Filepath) == list(serial.df.Filepath)
+        assert list(fr.df.Coheed) == list(serial.df.Coheed)
+
+
+def test_refresh(tmp_path):
+
+    def write(name, value):
+        _write_csv(tmp_path, name, (value, value))
+
+    write('data_Wfr=1.csv', 1)
+    write('data_Wfr=2.csv', 2)
+    write('data_Wfr=3.csv', 3)
+    fr = fileio.FileReader(str(tmp_path), verbose=False, read_func=_read_csv)
+    assert sorted(fr.df.Coheed) == [1, 2, 3]
+
+    write('data_Wfr=4.csv', 4)
+    write('data_Wfr=2.csv', 20)
+    os.remove(str(tmp_path / 'data_Wfr=3.csv'))
+    fr.refresh()
+    assert sorted(fr.df.Coheed) == [1, 4, 20]
+    assert sorted(fr.df.Wfr) == [1, 2, 4]
+
+
+def test_read_cache(tmp_path):
+
+    data = tmp_path / 'data'
+    data.mkdir()
+    _write_wafers(data, 3)
+    cache = str(tmp_path / 'cache')
+
+    _read_csv.calls = 0
+    cold = fileio.FileReader(str(data), verbose=False, read_func=_read_csv,
+                             cache_dir=cache)
+    assert _read_csv.calls == 3
+    warm = fileio.FileReader(str(data), verbose=False, read_func=_read_csv,
+                             cache_dir=cache)
+    assert _read_csv.calls == 3
+    assert warm.df.equals(cold.df)
+
+    # FileReader options and function addresses are not part of the key
+    warm = fileio.FileReader(str(data), verbose=False, read_func=_read_csv,
+                             cache_dir=cache, contains='Wfr', workers=2)
+    assert _read_csv.calls == 3
+    funcs = [lambda x: x for i in range(2)]
+    file = str(data / 'data_Wfr=0.csv')
+    keys = [fileio.ReadCache(cache).key(file, f, {'converters': {'a': f}})
+            for f in funcs]
+    assert keys[0] == keys[1]
+
+    # Eviction
+    fileio.ReadCache(cache, max_size=0).evict()
+    assert len(os.listdir(cache)) == 0
+
+
+def test_iter_frames(tmp_path):
+
+    _write_wafers(tmp_path, 3)
+
+    fr = fileio.FileReader(str(tmp_path), verbose=False, read_func=_read_csv,
+                           read=False)
+    for row, df, meta in fr.iter_frames():
+        assert df.loc[0, 'Coheed'] == row['Wfr']
+        assert df.loc[0, 'Filepath'] == row['Filepath']
+        assert meta is None
+    assert fr.file_list == list(fr.file_df.Filepath)
+
+
+def test_join_tags_concat(tmp_path):
+
+    for i in range(4):
+        _write_csv(tmp_path, 'data_Lot=L%s_Wfr=%s.csv' % (i % 2, i), (i, i),
+                   rows=2)
+
+    merged = fileio.FileReader(str(tmp_path), verbose=False,
+                               read_func=_read_csv)
+    joined = fileio.FileReader(str(tmp_path), verbose=False,
+                               read_func=_read_csv, join_tags='concat')
+    low_memory = fileio.FileReader(str(tmp_path), verbose=False,
+                                   read_func=_read_csv, join_tags='concat',
+                                   concat_low_memory=True)
+    assert list(joined.df.columns) == list(merged.df.columns)
+    assert joined.df.Lot.dtype == 'category'
+    assert merged.df.Filepath.dtype == 'category'
+    for col in merged.df.columns:
+        assert list(joined.df[col].astype(object)) == \
+            list(merged.df[col].astype(object))
+    pd.testing.assert_frame_equal(low_memory.df, joined.df)
+
+    # Data columns named like a tag keep both copies
+    clash = tmp_path / 'clash'
+    clash.mkdir()
+    for i in range(2):
+        (clash / ('data_T=%s.csv' % i)).write_text('T,Label,v\n%s,x,%s\n'
+                                                   % (100 + i, i))
+    merged = fileio.FileReader(str(clash), verbose=False,
+                               read_func=_read_csv)
+    joined = fileio.FileReader(str(clash), verbose=False,
+                               read_func=_read_csv, join_tags='concat')
+    assert list(joined.df.columns) == list(merged.df.columns)
+    assert sorted(joined.df.T_x) == [100, 101]
+    for col in merged.df.columns:
+        assert list(joined.df[col].astype(object)) == \
+            list(merged.df[col].astype(object))
+
+
+def test_meta_table(tmp_path):
+
+    for i in range(3):
+        meta = 'Lot,L%s\nTemp,%s\n' % (i, 25 + i)
+        if i == 2:
+            meta += 'Operator,Sue\n'
+        with open(str(tmp_path / ('data_%s.csv' % i)), 'w') as output:
+            output.write(meta + '[DATA]\nCoheed,Jane\n%s,%s\n' % (i, i))
+
+    file = str(tmp_path / 'data_2.csv')
+    meta = fileio.utilities.read_meta(file, '[DATA]', records=True)
+    assert meta == {'Lot': 'L2', 'Temp': 27, 'Operator': 'Sue'}
+
+    fr = fileio.FileReader(str(tmp_path), verbose=False,
+                           read_func=fileio.utilities.read_data,
+                           data_key='[DATA]')
+    fr.meta = fr.meta.sort_values('Filepath').reset_index(drop=True)
+    assert set(fr.meta.columns) == set(['Lot', 'Temp', 'Filepath',
+                                        'Operator'])
+    assert list(fr.meta.Temp) == [25, 26, 27]
+    assert fr.meta.Operator.isnull().sum() == 2
+
+    # Ragged, quoted and CRLF lines read the same from both readers
+    lines = ['Lot,"L1, A"\n', 'Temp,25,,\n', 'Limits, [1, 2]\r\n']
+    with open(file, 'w') as output:
+        output.write(''.join(lines) + '[DATA]\nCoheed,Jane\n1,1\n')
+    meta = fileio.utilities.read_meta(file, '[DATA]', records=True)
+    assert meta == fileio.utilities._parse_meta(lines, records=True)
+    assert meta == fileio.utilities.read_data(file, data_key='[DATA]',
+                                              meta_records=True)[1]
+    assert meta['Temp'] == 25
+
+
+def test_stats(tmp_path):
+
+    _write_wafers(tmp_path, 3, rows=2)
+
+    fr = fileio.FileReader(str(tmp_path), verbose=False, read_func=_read_csv)
+    assert len(fr.stats) == 3
+    assert list(fr.stats.Rows) == [2, 2, 2]
+    assert (fr.stats['Read Time'] > 0).all()
+    summary = fr.stats_summary()
+    assert summary['Files'] == 3
+    assert summary['Size (MB)'] == sum(fr.stats.Size) / 1e6
+    assert summary['Files/s'] > 0
+
+
+def test_walk_dir_filters(tmp_path):
+
+    for folder in ['lot1', 'lot2', osjoin('lot2', 'old'), 'old']:
+        os.makedirs(str(tmp_path / folder), exist_ok=True)
+        for name in ['data_Wfr=1.csv', 'data_Wfr=2.txt', 'log.csv']:
+            with open(osjoin(str(tmp_path), folder, name), 'w') as output:
+                output.write('Coheed,Jane\n1,2\n')
+
+    walked = [osjoin(d, f) for d, s, fl in os.walk(str(tmp_path))
+              for f in fl]
+    scanned = [osjoin(d, f) for d, s, fl in
+               fileio.utilities.scan_dir(str(tmp_path)) for f in fl]
+    assert scanned == walked
+
+    fr = fileio.FileReader(str(tmp_path), contains='data', exclude='old',
+                           ext='csv', read=False)
+    assert sorted(fr.file_list) == \
+        [osjoin(str(tmp_path), 'lot1', 'data_Wfr=1.csv'),
+         osjoin(str(tmp_path), 'lot2', 'data_Wfr=1.csv')]
+
+    fr = fileio.FileReader(str(tmp_path), contains_OR=['Wfr=1', 'Wfr'],
+                           exclude='lot', read=False)
+    assert sorted(fr.file_list) == \
+        [osjoin(str(tmp_path), 'old', 'data_Wfr=1.csv'),
+         osjoin(str(tmp_path), 'old', 'data_Wfr=2.txt')]
+
+
+def test_scan_dir_workers(tmp_path):
+
+    for i in range(4):
+        for j in range(4):
+            folder = tmp_path / ('lot%s' % i) / ('wafer%s' % j)
+            folder.mkdir(parents=True)
+            (folder / 'data.csv').write_text('Coheed,Jane\n1,2\n')
+
+    lock = threading.Lock()
+    calls = {'running': 0, 'max': 0}
+
+    def slow_scandir(path):
+        with lock:
+            calls['running'] += 1
+            calls['max'] = max(calls['max'], calls['running'])
+        time.sleep(0.02)
+        with lock:
+            calls['running'] -= 1
+        return os.scandir(path)
+
+    walked = list(os.walk(str(tmp_path)))
+    serial = list(fileio.utilities.scan_dir(str(tmp_path),
+                                            scandir=slow_scandir))
+    assert serial == walked
+    assert calls['max'] == 1
+
+    threaded = list(fileio.utilities.scan_dir(str(tmp_path), workers=8,
+                                              scandir=slow_scandir))
+    assert threaded == walked
+    assert calls['max'] > 1
+
+
+def test_scan_manifest(tmp_path):
+
+    data = tmp_path / 'data'
+    for i in range(3):
+        (data / ('lot%s' % i)).mkdir(parents=True)
+        (data / ('lot%s' % i) / 'data.csv').write_text('Coheed,Jane\n1,2\n')
+    manifest = str(tmp_path / 'manifest.json')
+
+    def age(folder):
+        os.utime(str(folder), (time.time() - 10, time.time() - 10))
+
+    for folder in [data] + list(data.iterdir()):
+        age(folder)
+    calls = []
+
+    def counting_scandir(path):
+        calls.append(path)
+        return os.scandir(path)
+
+    fr = fileio.FileReader(str(data), manifest=manifest, read=False)
+    assert len(fr.file_list) == 3
+
+    dirs = fileio.utilities.read_manifest(manifest)
+    walked = list(fileio.utilities.scan_dir(str(data), manifest=dirs,
+                                            scandir=counting_scandir))
+    assert walked == list(os.walk(str(data)))
+    assert calls == []
+
+    # Changed directories are listed again, removed ones are dropped
+    (data / 'lot1' / 'more.csv').write_text('Coheed,Jane\n1,2\n')
+    os.remove(str(data / 'lot2' / 'data.csv'))
+    os.rmdir(str(data / 'lot2'))
+    walked = list(fileio.utilities.scan_dir(str(data), manifest=dirs,
+                                            scandir=counting_scandir))
+    assert walked == list(os.walk(str(data)))
+    assert osjoin(str(data), 'lot2') not in dirs
+
+    # Directories modified just before the scan are not trusted later
+    assert osjoin(str(data), 'lot1') not in dirs
+    calls.clear()
+    list(fileio.utilities.scan_dir(str(data), manifest=dirs,
+                                   scandir=counting_scandir))
+    assert calls == [str(data), osjoin(str(data), 'lot1')]
+    age(data)
+    age(data / 'lot1')
+    list(fileio.utilities.scan_dir(str(data), manifest=dirs))
+    calls.clear()
+    list(fileio.utilities.scan_dir(str(data), manifest=dirs,
+                                   scandir=counting_scandir))
+    assert calls == []
+
+
+def test_query(tmp_path):
+
+    for lot in ['A', 'B']:
+        for i in range(3):
+            _write_csv(tmp_path, 'data_%s_%s.csv' % (lot, i), (i, i))
+
+    _read_csv.calls = 0
+    fr = fileio.FileReader(str(tmp_path), split_values=[None, 'Lot', 'Wafer'],
+                           read_func=_read_csv, read=False, verbose=False)
+    fr.query('Wafer > 0', Lot='B').read_files()
+    assert _read_csv.calls == 2
+    assert sorted(fr.df.Wafer) == [1, 2]
+    assert set(fr.df.Lot) == set(['B'])
+
+    fr = fileio.FileReader(str(tmp_path), split_values=[None, 'Lot', 'Wafer'],
+                           read_func=_read_csv, query='Wafer == 0',
+                           verbose=False)
+    assert sorted(fr.df.Lot) == ['A', 'B']
+
+
+def test_schema(tmp_path):
+
+    rows = {'data_1.csv': 'Coheed,Jane,Sue\n1,2.5,a\n',
+            'data_2.csv': 'Coheed,Jane,Sue,Extra\n2,3.5,b,x\n',
+            'data_3.csv': 'Coheed,Jane,Sue\nnope,4.5,c\n',
+            'data_4.csv': 'Coheed,Sue\n4,d\n'}
+    for name, text in rows.items():
+        (tmp_path / name).write_text(text)
+
+    files = [str(tmp_path / f) for f in sorted(rows.keys())]
+    fr = fileio.FileReader(files, read_func=_read_csv_schema, schema=True,
+                           usecols=['Coheed', 'Jane'], verbose=False)
+    assert list(fr.schema.keys()) == ['Coheed', 'Jane']
+    assert list(fr.df.Coheed) == [1, 2]
+    assert 'Sue' not in fr.df.columns
+    assert sorted([os.path.basename(f) for f in fr.schema_errors]) == \
+        ['data_3.csv', 'data_4.csv']
+
+    # Schema is also inferred when iterating
+    fr = fileio.FileReader(files, read_func=_read_csv_schema, schema=True,
+                           usecols=['Coheed', 'Jane'], read=False,
+                           verbose=False)
+    frames = [df for row, df, meta in fr.iter_frames()]
+    assert list(fr.schema.keys()) == ['Coheed', 'Jane']
+    assert [list(df.Coheed) for df in frames] == [[1], [2]]
+    assert len(fr.schema_errors) == 2
+
+    # Files that cannot be parsed are read errors, not schema mismatches
+    for name, text in [('data_5.csv', b'Coheed,Jane\n1,"2.5\n'),
+                       ('data_5.csv', b'Coheed,Jane\n1,\xff\n'),
+                       ('data_5.csv', b'')]:
+        (tmp_path / name).write_bytes(text)
+        try:
+            fileio.FileReader(files + [str(tmp_path / name)],
+                              read_func=_read_csv_schema, schema=True,
+                              verbose=False)
+            assert False
+        except ValueError as e:
+            assert 'File Read Error' in str(e)
+
+
+def test_config_cache(tmp_path, monkeypatch):
+
+    file = tmp_path / 'config.ini'
+    file.write_text('[Plot]\nwidth = 400\ncolors = [1, 2]\n')
+    fileio.config.clear_cache()
+    first = fileio.ConfigFile(str(file))
+    second = fileio.ConfigFile(str(file))
+    assert second.config_dict == {'Plot': {'width': 400, 'colors': [1, 2]}}
+    assert second.config.get('Plot', 'width') == '400'
+
+    # Cached configs are not shared
+    second.config_dict['Plot']['colors'] += [3]
+    assert fileio.ConfigFile(str(file)).config_dict['Plot']['colors'] == \
+        [1, 2]
+
+    # Changes on disk are picked up
+    file.write_text('[Plot]\nwidth = 4000\n')
+    assert fileio.ConfigFile(str(file)).config_dict == \
+        {'Plot': {'width': 4000}}
+    assert first.config_dict['Plot']['width'] == 400
+    assert first.reload()
+    assert first.config_dict == {'Plot': {'width': 4000}}
+    assert not first.reload()
+    assert first.reload(force=True)
+
+    # Cache size is bounded
+    monkeypatch.setattr(fileio.config, 'CONFIG_CACHE_SIZE', 1)
+    other = tmp_path / 'other.ini'
+    other.write_text('[Plot]\nwidth = 1\n')
+    fileio.ConfigFile(str(other))
+    assert list(fileio.config._cache.keys()) == [os.path.abspath(str(other))]
+
+
+def test_config_lazy(tmp_path):
+
+    file = tmp_path / 'config.ini'
+    file.write_text('[Plot]\nwidth = 400\ncolors = [1, 2]\nname = a\n')
+    config = fileio.ConfigFile(str(file), cache=False)
+    section = config.config_dict['Plot']
+    assert dict.__getitem__(section, 'width') == '400'
+    assert section['width'] == 400
+    assert dict.__getitem__(section, 'width') == 400
+    assert dict.__getitem__(section, 'colors') == '[1, 2]'
+    assert fileio.ConfigFile(str(file), cache=False).config_dict == \
+        fileio.ConfigFile(str(file), cache=False).config_dict
+
+    # Writes are stored as is and written back
+    section['name'] = '7'
+    section.update(height=300)
+    assert section == {'width': 400, 'colors': [1, 2], 'name': '7',
+                       'height': 300}
+    config.write(str(file))
+    assert fileio.ConfigFile(str(file), cache=False).config_dict == \
+        {'PLOT': {'width': 400, 'colors': [1, 2], 'name': 7, 'height': 300}}
+
+    # popitem converts the value and fails like a dict when empty
+    assert section.popitem() == ('height', 300)
+    section.clear()
+    try:
+        section.popitem()
+        assert False
+    except KeyError as e:
+        assert 'dictionary is empty' in str(e)
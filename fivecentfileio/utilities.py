@@ -14,30 +14,428 @@ except:
     import ConfigParser as configparser
 import os
 oswalk = os.walk
+from concurrent import futures
+import numpy as np
 import pandas as pd
 import pdb
 import re
 import ast
+import copy
+import functools
+import inspect
+import json
 import stat
 import sys
+import time
+import bz2
 import gzip
+import io
+import lzma
+import mmap
 try:
     import win32clipboard
 except Exception:
     pass
+try:
+    import pyarrow
+except Exception:
+    pyarrow = None
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+try:
+    import lz4.frame
+except Exception:
+    lz4 = None
 from docutils import core
 osjoin = os.path.join
 osexists = os.path.exists
 st = pdb.set_trace
 print_std = print
+# Supported compression formats by magic bytes and by file extension (the
+#   bz2 header is checked up to its block magic so text starting with "BZh"
+#   is not mistaken for it)
+COMPRESSION_MAGIC = [(re.compile(rb'\x1f\x8b'), 'gzip'),
+                     (re.compile(rb'BZh[1-9](?:1AY&SY|\x17rE8P\x90)'), 'bz2'),
+                     (re.compile(rb'\xfd7zXZ\x00'), 'xz'),
+                     (re.compile(rb'\x28\xb5\x2f\xfd'), 'zstd'),
+                     (re.compile(rb'\x04\x22\x4d\x18'), 'lz4')]
+COMPRESSION_EXT = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd',
+                   '.lz4': 'lz4'}
+# Directories modified less than this long before they are listed are not
+#   stored in a scan_dir manifest (their modified time may not change for a
+#   file added in the same tick; 2 s covers FAT/SMB time stamps)
+MANIFEST_RACY_NS = 2 * 10**9
+# Default limit on how far into a file the meta section data key is searched
+META_MAX_BYTES = 2**26
+# pd.read_csv options the pyarrow engine rejects
+PYARROW_UNSUPPORTED = ['chunksize', 'comment', 'converters', 'dayfirst',
+                       'delim_whitespace', 'dialect', 'float_precision',
+                       'iterator', 'lineterminator', 'low_memory',
+                       'memory_map', 'nrows', 'on_bad_lines', 'quoting',
+                       'skipfooter', 'skipinitialspace', 'thousands']
+# str_2_dtype patterns and the size of its memo of full parses
+RE_COMMENT = re.compile("#(?=([^\"]*\"[^\"]*\")*[^\"]*$)")
+RE_DICT_ITEM = re.compile(''',(?=(?:[^'"]|'[^']*'|"[^"]*")*$)''')
+RE_DICT_KEY = re.compile(''':(?=(?:[^'"]|'[^']*'|"[^"]*")*$)''')
+RE_FLOAT = re.compile(r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)'
+                      r'(?:[eE][+-]?[0-9]+)?')
+RE_INT = re.compile(r'[+-]?[0-9]+')
+RE_LIST_ITEM = re.compile(',(?=(?:"[^"]*?(?: [^"]*)*))|,(?=[^",]+(?:,|$))')
+RE_QUOTED = re.compile(r'"([^"]*)"')
+RE_STRUCTURED = re.compile(r'[#,\[{("\'\\]')  # needs the full parse
+RE_TEXT = re.compile(r'\s*[+-]?[A-HJ-MO-Za-hj-mo-z]')  # cannot be a number
+STR_2_DTYPE_CACHE = 2**16
+# Fewer unique values than this are converted by str_2_dtype one by one in
+#   series_2_dtype (the vectorized matching has a fixed cost of a few ms)
+SERIES_2_DTYPE_MIN = 10000
+
+
+def _concat_dtype(dtypes, missing):
+    """
+    Get the dtype of a column in the concatenation of several DataFrames
 
+    Args:
+        dtypes (list): dtype of the column in each frame that has it
+        missing (bool): True if some frames do not have the column
 
-def _is_gz(filename):
+    Returns:
+        numpy dtype or None if the column must be concatenated by pandas
     """
-    Check if gzip compressed by file extension
-     (not supporting arbitrary compression types here)
+
+    first = dtypes[0]
+    if any([not isinstance(f, np.dtype) for f in dtypes]):
+        if all([f == first for f in dtypes]):
+            return first
+        return None
+
+    kinds = set([f.kind for f in dtypes])
+    if kinds <= set('iuf') or kinds == set('b'):
+        dtype = np.result_type(*dtypes)
+        if missing and dtype.kind == 'b':
+            return np.dtype(object)
+        if missing and dtype.kind in 'iu':
+            return np.dtype('float64')
+        return dtype
+    if kinds <= set('mM') and all([f == first for f in dtypes]):
+        return first
+
+    # Mixed kinds (ex. bool and int) follow the pd.concat promotion, found
+    #   on one row of each dtype
+    frames = [pd.DataFrame({'c': np.zeros(1, dtype=f)}) for f in dtypes]
+    if missing:
+        frames += [pd.DataFrame({'d': np.zeros(1)})]
+
+    return pd.concat(frames, axis=0)['c'].dtype
+
+
+def _csv_engine(engine, kwargs):
+    """
+    Pick the pd.read_csv parser engine
+
+    Args:
+        engine (None|str): requested engine; "auto" selects pyarrow when
+            it is installed and supports every other kwarg, else "c"
+            (skipinitialspace=False is the pyarrow behavior, so it is
+            supported)
+        kwargs (dict): other read_csv keyword args
+
+    Returns:
+        engine name or None for the pandas default
     """
-    return True if filename[-3:] == '.gz' else False
+
+    if engine not in ['auto', 'pyarrow']:
+        return engine
+
+    if pyarrow is None:
+        return 'c'
+
+    if engine == 'auto' and any([k in PYARROW_UNSUPPORTED for k, v in
+                                 kwargs.items()
+                                 if k != 'skipinitialspace' or v]):
+        return 'c'
+
+    return 'pyarrow'
+
+
+def _compression(filename, magic=True):
+    """
+    Get the compression format of a file from its magic bytes or, for new
+    or empty files, from its extension
+
+    Args:
+        filename (str): path to the file
+        magic (bool): check the magic bytes of an existing file
+
+    Returns:
+        "gzip", "bz2", "xz", "zstd", "lz4" or None if not compressed
+    """
+
+    if magic:
+        try:
+            with open(filename, 'rb') as input:
+                head = input.read(10)
+            for key, compression in COMPRESSION_MAGIC:
+                if key.match(head):
+                    return compression
+            if len(head) > 0:
+                return None
+        except OSError:
+            pass
+
+    return COMPRESSION_EXT.get(os.path.splitext(filename)[-1].lower(), None)
+
+
+def _open(filename, mode='rb', threads=0, newline=None):
+    """
+    Open a plain or compressed (gzip, bz2, xz, zstd or lz4) file
+
+    Existing files are read/appended with the compression found from their
+    magic bytes; new files use the compression of their extension
+
+    Args:
+        filename (str): path to the file
+        mode (str): file mode
+        threads (int): compression threads for zstd writes (-1 = all cores)
+        newline (None|str): newline mode of text files
+
+    Returns:
+        file object
+    """
+
+    compression = _compression(filename, magic='w' not in mode)
+    if compression is None and 'b' in mode:
+        return open(filename, mode)
+    elif compression is None:
+        return open(filename, mode, newline=newline)
+
+    binary = mode.replace('t', '') + ('b' if 'b' not in mode else '')
+    if compression == 'gzip':
+        file = gzip.open(filename, binary)
+    elif compression == 'bz2':
+        file = bz2.open(filename, binary)
+    elif compression == 'xz':
+        file = lzma.open(filename, binary)
+    elif compression == 'zstd':
+        if zstandard is None:
+            raise ImportError('zstandard must be installed to use zstd '
+                              'compressed file: %s' % filename)
+        raw = open(filename, binary)
+        if 'r' in mode:
+            file = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(
+                raw, read_across_frames=True, closefd=True))
+        else:
+            file = zstandard.ZstdCompressor(threads=threads).stream_writer(
+                raw, closefd=True)
+    else:
+        if lz4 is None:
+            raise ImportError('lz4 must be installed to use lz4 compressed '
+                              'file: %s' % filename)
+        file = lz4.frame.open(filename, binary)
+
+    if 'b' not in mode:
+        return io.TextIOWrapper(file, newline=newline)
+
+    return file
+
+
+def _make_meta(keys, values, records=False):
+    """
+    Convert the values of a meta section and build its output
+
+    Args:
+        keys (list): meta names
+        values (list|pd.Series): raw meta values
+        records (bool): return a {name: value} dict instead of a DataFrame
+            (the last value is kept for repeated names)
+
+    Returns:
+        pd.DataFrame or dict of meta data
+    """
+
+    if len(values) < SERIES_2_DTYPE_MIN:
+        values = [str_2_dtype(f) for f in values]
+    else:
+        values = list(series_2_dtype(values, unify=False))
+
+    if records:
+        return dict(zip(keys, values))
+
+    meta = pd.DataFrame(values).T
+    meta.columns = keys
+
+    return meta
+
+
+def _parse_meta(lines, sep=',', records=False):
+    """
+    Convert the "name<sep>value" lines of a meta section into a one row
+    DataFrame
+
+    Args:
+        lines (list): meta lines (without the data key line)
+        sep (str): delimiter for meta data
+        records (bool): return a {name: value} dict instead of a DataFrame
+            (the last value is kept for repeated names)
+
+    Returns:
+        pd.DataFrame or dict of meta data
+    """
+
+    key = []
+    val = []
+    for line in lines:
+        vals = line.split(sep)
+        key += [vals[0]]
+        val += [vals[1].lstrip(' ').strip(',\n\r')]
+
+    return _make_meta(key, val, records)
+
+
+@functools.lru_cache()
+def _read_csv_kwargs():
+    """
+    Get the keyword args accepted by the installed version of pd.read_csv
+    """
+
+    return set(inspect.signature(pd.read_csv).parameters.keys())
+
+
+def _read_meta_lines(lines, sep=',', records=False, encoding='utf-8'):
+    """
+    Convert the raw "name<sep>value" lines of a meta section read from a
+    binary file (decoded as one block and converted as one column by
+    _parse_meta)
+
+    Args:
+        lines (list): meta lines as bytes (without the data key line)
+        sep (str): delimiter for meta data
+        records (bool): return a {name: value} dict instead of a DataFrame
+        encoding (str): text encoding of the file
+
+    Returns:
+        pd.DataFrame or dict of meta data
+    """
+
+    text = b''.join(lines).decode(encoding)
+    if text.endswith('\n'):
+        text = text[:-1]
+
+    return _parse_meta(text.split('\n') if len(text) > 0 else [], sep,
+                       records)
+
+
+def _str_2_dtype(val, ignore_list=False):
+    """
+    Full parse of str_2_dtype for values that may hold comments, quotes or
+    containers (see str_2_dtype)
+    """
+    if len(val) == 0:
+        return ''
+
+    # Special chars
+    chars = {'\\t':'\t', '\\n':'\n', '\\r':'\r'}
+
+    # Remove comments
+    v = RE_COMMENT.split(val)
+    if len(v) > 1:  # handle comments
+        v = [f for f in v if f is not None]
+        if v[0] == '':
+            val = '#' + v[1].rstrip().lstrip()
+        else:
+            val = v[0].rstrip().lstrip()
+
+    # Special
+    if val in chars.keys():
+        val = chars[val]
+    # None
+    if val == 'None':
+        return None
+    # bool
+    if val == 'True':
+        return True
+    if val == 'False':
+        return False
+    # dict
+    if ':' in val and '{' in val:
+        val = val.replace('{','').replace('}','')
+        val = RE_DICT_ITEM.split(val)
+        k = []
+        v = []
+        for t in val:
+            tt = RE_DICT_KEY.split(t)
+            k += [str_2_dtype(tt[0], ignore_list=True)]
+            v += [str_2_dtype(':'.join(tt[1:]))]
+        return dict(zip(k,v))
+    # tuple
+    if val[0] == '(' and val[-1] == ')' and ',' in val:
+        return ast.literal_eval(val)
+    # list
+    if (',' in val or val.lstrip(' ')[0] == '[') and not ignore_list \
+            and val != ',':
+        if val[0] == '"' and val[-1] == '"' and ', ' not in val:
+            return str(val.replace('"', ''))
+        if val.lstrip(' ')[0] == '[':
+            val = val.lstrip('[').rstrip(']')
+        val = val.replace(', ', ',')
+        new = []
+        val = RE_LIST_ITEM.split(val)
+        for v in val:
+            if '=="' in v:
+                new += [v.rstrip().lstrip()]
+            elif '"' in v:
+                double_quoted = [f for f in RE_QUOTED.findall(v)
+                                 if f != '']
+                v = str(v.replace('"', ''))
+                for dq in double_quoted:
+                    v = v.replace(dq, '"%s"' % dq)
+                try:
+                    if type(ast.literal_eval(v.lstrip())) is str:
+                        v = ast.literal_eval(v.lstrip())
+                    new += [v]
+                except:
+                    new += [v.replace('"','').rstrip().lstrip()]
+            else:
+                try:
+                    new += [str_2_dtype(v.replace('"','').rstrip().lstrip())]
+                except RecursionError:
+                    pass
+        if len(new) == 1:
+            return new[0]
+        return new
+    # float and int
+
+    try:
+        int(val)
+        return int(val)
+    except:
+        try:
+            float(val)
+            return float(val)
+        except:
+            v = val.split('#')
+            if len(v) > 1:  # handle comments
+                if v[0] == '':
+                    return '#' + v[1].rstrip().lstrip()
+                else:
+                    return v[0].rstrip().lstrip()
+            else:
+                val = val.rstrip().lstrip()
+                if val[0] in ['"', "'"] and val[-1] in ['"', "'"]:
+                    return val.strip('\'"')
+                else:
+                    return val
+
+
+@functools.lru_cache(maxsize=STR_2_DTYPE_CACHE)
+def _str_2_dtype_cached(val, ignore_list):
+    """
+    Memo of _str_2_dtype (the results are shared so str_2_dtype copies the
+    mutable ones)
+    """
+
+    return _str_2_dtype(val, ignore_list)
 
 
 def align_values(df, rjust=True, first_col=2):
@@ -103,6 +501,128 @@ def check_file(filename, verbose=True):
         return False
 
 
+def concat_frames(frames):
+    """
+    Concatenate DataFrames along the rows with less peak memory than
+    pd.concat
+
+    The union of the columns and their common dtypes are found first, then
+    each output column is allocated once and the frames are copied into
+    place.  Frames are removed from the input list as they are copied so
+    their memory can be released before the concatenation is finished.
+    Columns with mixed extension dtypes are concatenated by pandas.
+
+    This is slower than pd.concat and only lowers the peak memory when the
+    allocator returns the freed frames to the OS (ex. glibc with a low
+    MALLOC_MMAP_THRESHOLD_, where benchmarks/bench_concat.py peaks at about
+    a quarter of the pd.concat memory), so FileReader only uses it with
+    concat_low_memory=True.
+
+    Args:
+        frames (list): DataFrames to concatenate (emptied by this function)
+
+    Returns:
+        pd.DataFrame
+    """
+
+    if len(frames) == 0:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames.pop()
+
+    if any([len(set(df.columns)) < len(df.columns) for df in frames]):
+        return pd.concat(frames, axis=0)
+
+    # Unified schema (columns in order of appearance)
+    dtypes = {}
+    for df in frames:
+        for col, dtype in df.dtypes.items():
+            dtypes.setdefault(col, []).append(dtype)
+    schema = {col: _concat_dtype(dt, len(dt) < len(frames))
+              for col, dt in dtypes.items()}
+
+    # Output index and columns
+    lengths = [len(df) for df in frames]
+    if all([type(df.index) is pd.RangeIndex for df in frames]):
+        index = pd.Index(np.concatenate([np.asarray(df.index)
+                                         for df in frames]))
+    else:
+        index = frames[0].index.append([df.index for df in frames[1:]])
+    # Columns with the same storage dtype are copied as one 2d block
+    #   (extension dtypes are stored as object until the end)
+    blocks, pieces = {}, {}
+    for col, dtype in schema.items():
+        if dtype is None:
+            pieces[col] = []
+            schema[col] = [f for f in dtypes[col]
+                           if not isinstance(f, np.dtype)][0]
+        else:
+            store = dtype if isinstance(dtype, np.dtype) else np.dtype(object)
+            blocks.setdefault(store, []).append(col)
+    arrays = {store: np.empty((sum(lengths), len(cols)), dtype=store,
+                              order='F')
+              for store, cols in blocks.items()}
+
+    # Copy each frame into place and release it (the column positions are
+    #   found once per distinct column layout)
+    layouts = {}
+    start = 0
+    frames.reverse()
+    for n in lengths:
+        df = frames.pop()
+        columns = tuple(df.columns)
+        if columns not in layouts:
+            where = {col: i for i, col in enumerate(columns)}
+            layouts[columns] = []
+            for store, cols in blocks.items():
+                have = [i for i, col in enumerate(cols) if col in where]
+                positions = [where[cols[i]] for i in have]
+                if len(positions) > 0 and positions == \
+                        list(range(positions[0], positions[-1] + 1)):
+                    positions = slice(positions[0], positions[-1] + 1)
+                if len(have) == len(cols):
+                    have = slice(None)
+                missing = [i for i, col in enumerate(cols)
+                           if col not in where]
+                layouts[columns] += [(store, have, positions, missing)]
+        for col in pieces:
+            pieces[col] += [df[col] if col in df.columns else
+                            pd.Series(pd.array([None] * n, dtype=schema[col]))]
+
+        # positional column labels make the block selection cheap
+        df = df.set_axis(pd.RangeIndex(len(columns)), axis=1)
+        for store, have, positions, missing in layouts[columns]:
+            block = arrays[store][start:start + n]
+            for i in missing:
+                col = blocks[store][i]
+                if store.kind in 'mM':
+                    block[:, i] = np.array('NaT', dtype=store)
+                elif store.kind == 'O' and schema[col] != store:
+                    block[:, i] = schema[col].na_value
+                else:
+                    block[:, i] = np.nan
+            if len(missing) < len(blocks[store]):
+                block[:, have] = \
+                    df.iloc[:, positions].to_numpy(dtype=store)
+        start += n
+        del df
+
+    out = {}
+    for store, cols in blocks.items():
+        for i, col in enumerate(cols):
+            values = arrays[store][:, i]
+            if schema[col] != store:
+                values = pd.array(values, dtype=schema[col])
+            out[col] = pd.Series(values, index=index, dtype=values.dtype,
+                                 copy=False)
+    for col in pieces:
+        values = pd.concat(pieces[col], axis=0).array
+        out[col] = pd.Series(values, index=index, dtype=values.dtype,
+                             copy=False)
+
+    return pd.DataFrame({col: out[col] for col in schema}, copy=False)
+
+
 def convert_rst(file_name, stylesheet=None):
     """ Converts single rst files to html
 
@@ -208,6 +728,25 @@ def get_mtime(file):
         return 0
 
 
+def get_size(file):
+    """
+    Get the size of a file in bytes
+        Handles exceptions
+
+    Args:
+        file (str): filename
+
+    Returns:
+        file size
+
+    """
+
+    try:
+        return os.path.getsize(file)
+    except:
+        return 0
+
+
 def print(text, verbose=True, post_text='', line_len=79,
           start='\r', end='\n', **kwargs):
     """
@@ -236,12 +775,14 @@ def print(text, verbose=True, post_text='', line_len=79,
 
 
 def meta_length(filename, data_keys=['[DATA]'], max_lines=None, next_line=False,
-                verbose=True):
+                verbose=True, max_bytes=META_MAX_BYTES):
     """
     For text files containing meta and raw data separated by one or more keys,
     returns the number of rows of meta data
 
-    File is read line by line until one of the data_keys is found
+    Uncompressed files are memory-mapped and searched for the first data key
+    as bytes; compressed files are read line by line until one of the
+    data_keys is found
 
     Ex file setup:
         Meta name 1,value1
@@ -263,6 +804,8 @@ def meta_length(filename, data_keys=['[DATA]'], max_lines=None, next_line=False,
         next_line (bool):  optionally return the next line in the file if data key
             is found
         verbose (bool):  toggle printing of warnings
+        max_bytes (None | int):  set a limit on how many bytes (characters
+            for compressed files) are searched for the data key
 
     Returns:
         int number of rows for the meta section of a file, optional line after
@@ -279,22 +822,47 @@ def meta_length(filename, data_keys=['[DATA]'], max_lines=None, next_line=False,
         return -1
 
     def _parse_meta(file):
+        nbytes = 0
         for iline, line in enumerate(file):
             found = any(key in line for key in data_keys)
             if found and next_line:
-                return iline + 1, next(file).strip('\r').strip('\n')
+                return iline + 1, next(file, '').strip('\r').strip('\n')
             elif found:
                 return iline + 1
             if max_lines is not None and iline + 1 >= max_lines:
                 return -1
+            nbytes += len(line)
+            if max_bytes is not None and nbytes >= max_bytes:
+                return -1
         return -1
 
+    def _search_meta(mm):
+        limit = len(mm) if max_bytes is None else min(len(mm), max_bytes)
+        found = [mm.find(key.encode('utf-8'), 0, limit) for key in data_keys]
+        found = [f for f in found if f >= 0]
+        if len(found) == 0:
+            return -1
+        iline = mm[0:min(found)].count(b'\n')
+        if max_lines is not None and iline + 1 > max_lines:
+            return -1
+        if not next_line:
+            return iline + 1
+        start = mm.find(b'\n', min(found)) + 1
+        if start == 0:
+            return iline + 1, ''
+        end = mm.find(b'\n', start)
+        line = mm[start:end if end >= 0 else len(mm)].decode('utf-8')
+        return iline + 1, line.strip('\r').strip('\n')
+
     # Parse the meta section of the file
-    if _is_gz(filename):
-        with gzip.open(filename, "rt") as file:
-            return _parse_meta(file)
+    if _compression(filename) is None:
+        with open(filename, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return -1
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _search_meta(mm)
 
-    with open(filename, 'r') as file:
+    with _open(filename, 'rt') as file:
         return _parse_meta(file)
 
 
@@ -303,13 +871,19 @@ def read_csv(filename, data_key=None, sep_meta=None, **kwargs):
     Wrapper for pandas.read_csv to deal with kwargs overload
 
     Args:
-        filename (str): filename
+        filename (str | file): filename or an open file positioned at the
+            start of the csv data
         data_key (None | list | str):  keys to separate the data file into
             a meta and data section; uses meta_length to find the split between
             sections
         sep_meta (None | str):  optional different character for parsing
             the meta section
-        **kwargs: valid keyword arguments for pd.read_csv
+        **kwargs: valid keyword arguments for pd.read_csv; engine may also
+            be "auto" to use the multithreaded pyarrow parser when it is
+            installed and supports the other kwargs (falls back to the C
+            parser).  skipinitialspace defaults to True except with the
+            pyarrow engine, which does not support it, so "auto" only
+            selects pyarrow when skipinitialspace=False is passed
 
     Returns:
         pandas.DataFrame containing the csv data and optional meta dataframe
@@ -318,51 +892,70 @@ def read_csv(filename, data_key=None, sep_meta=None, **kwargs):
     verbose = kwargs.get('verbose', True)
 
     # Check if file exists
-    exists = check_file(filename, verbose)
-    if not exists:
+    is_path = isinstance(filename, (str, os.PathLike))
+    if is_path and not check_file(filename, verbose):
         return -1
 
     # kwargs may contain values that are not valid in the read_csv function;
     #  we need to filter those out first before calling the function
-    kw_master = ['filepath_or_buffer', 'sep', 'dialect', 'compression',
-                 'doublequote', 'escapechar', 'quotechar', 'quoting',
-                 'skipinitialspace', 'lineterminator', 'header', 'index_col',
-                 'names', 'prefix', 'skiprows', 'skipfooter', 'skip_footer',
-                 'na_values', 'true_values', 'false_values', 'delimiter',
-                 'converters', 'dtype', 'usecols', 'engine',
-                 'delim_whitespace', 'as_recarray', 'na_filter',
-                 'compact_ints', 'use_unsigned', 'low_memory', 'buffer_lines',
-                 'warn_bad_lines', 'error_bad_lines', 'keep_default_na',
-                 'thousands', 'comment', 'decimal', 'parse_dates',
-                 'keep_date_col', 'dayfirst', 'date_parser', 'memory_map',
-                 'float_precision', 'nrows', 'iterator', 'chunksize',
-                 'verbose', 'encoding', 'squeeze', 'mangle_dupe_cols',
-                 'tupleize_cols', 'infer_datetime_format', 'skip_blank_lines']
+    kw_master = _read_csv_kwargs()
 
     # Deal with keywords
-    delkw = [f for f in kwargs.keys() if f not in kw_master]
-    for kw in delkw:
-        kwargs.pop(kw)
-    if 'skipinitialspace' not in kwargs.keys():
+    kwargs = {k: v for k, v in kwargs.items()
+              if k in kw_master and k != 'verbose'}
+    if 'skipinitialspace' not in kwargs.keys() \
+            and kwargs.get('engine', None) != 'pyarrow':
         kwargs['skipinitialspace'] = True
+    engine = _csv_engine(kwargs.get('engine', None), kwargs)
+    if engine is not None:
+        kwargs['engine'] = engine
+
+    # Compression found from the magic bytes (pandas only checks the
+    #   extension and does not read lz4); formats that are not detected
+    #   (ex. zip) are left to the pandas extension inference
+    if is_path and 'compression' not in kwargs.keys():
+        compression = _compression(filename)
+        if compression == 'lz4':
+            with _open(filename, 'rb') as file:
+                return read_csv(file, **kwargs)
+        if compression is not None \
+                or os.path.splitext(filename)[-1].lower() in COMPRESSION_EXT:
+            kwargs['compression'] = compression
 
     # Read the data section
+    if engine == 'pyarrow':
+        start = None if is_path else filename.tell()
+        try:
+            return pd.read_csv(filename, **kwargs)
+        except ValueError:
+            # option not supported by pyarrow or data it cannot parse
+            kwargs['engine'] = 'c'
+            kwargs.setdefault('skipinitialspace', True)
+            if start is not None:
+                filename.seek(start)
+
     df = pd.read_csv(filename, **kwargs)
 
     return df
 
 
-def read_data(filename, data_key=None, sep_meta=None, **kwargs):
+def read_data(filename, data_key=None, sep_meta=None, meta_records=False,
+              **kwargs):
     """
     Wrapper for pandas.read_csv to deal with kwargs overload
 
+    When a data_key is given, the file is opened (and decompressed) only
+    once: the meta lines are read up to the data key and the same open
+    stream is handed to the csv parser for the data section
+
     Args:
         filename (str): filename
         data_key (None | list | str):  keys to separate the data file into
-            a meta and data section; uses meta_length to find the split between
-            sections
+            a meta and data section
         sep_meta (None | str):  optional different character for parsing
             the meta section
+        meta_records (bool):  return the meta as a {name: value} dict
+            instead of a one row DataFrame
         **kwargs: valid keyword arguments for pd.read_csv
 
     Returns:
@@ -376,32 +969,71 @@ def read_data(filename, data_key=None, sep_meta=None, **kwargs):
     if not exists:
         return -1, -1
 
-    # Check for a meta section
-    if data_key is not None:
-        skiprows = meta_length(filename, data_key, verbose=verbose)
-    else:
-        skiprows = None
+    if data_key is None:
+        return read_csv(filename, **kwargs)
 
-    # Read the data section
-    df = read_csv(filename, skiprows=skiprows, **kwargs)
-
-    # Read the meta section
-    if data_key is not None and skiprows > 0:
-        if sep_meta is None:
-            if 'sep_meta' in kwargs.keys():
-                sep_meta = kwargs['sep_meta']
-            elif 'sep' in kwargs.keys():
-                sep_meta = kwargs['sep']
-            else:
-                sep_meta = ','
-        meta = read_meta(filename, data_key, sep_meta, verbose=verbose)
-        return df, meta
+    if sep_meta is None:
+        if 'sep_meta' in kwargs.keys():
+            sep_meta = kwargs['sep_meta']
+        elif 'sep' in kwargs.keys():
+            sep_meta = kwargs['sep']
+        else:
+            sep_meta = ','
+
+    data_keys = validate_list(data_key)
+    encoding = kwargs.get('encoding', None) or 'utf-8'
+    byte_keys = [f.encode(encoding) for f in data_keys]
+
+    with _open(filename, 'rb') as file:
+        # Read the meta section (decoded in one block once the key is found)
+        lines = []
+        found = False
+        nbytes = 0
+        for line in iter(file.readline, b''):
+            nbytes += len(line)
+            if any(key in line for key in byte_keys):
+                found = True
+                break
+            if nbytes >= META_MAX_BYTES:
+                break
+            lines += [line]
 
-    else:
-        return df
+        # Read the data section from the current position
+        if found:
+            df = read_csv(file, **kwargs)
+
+    if not found:
+        return read_csv(filename, **kwargs)
+
+    return df, _read_meta_lines(lines, sep_meta, meta_records, encoding)
 
 
-def read_meta(filename, data_keys, sep=',', max_lines=None, verbose=True):
+def read_manifest(filename):
+    """
+    Read a directory manifest saved by write_manifest
+
+    Args:
+        filename (str): path to the manifest file
+
+    Returns:
+        manifest dict for scan_dir (empty if the file is missing or invalid)
+
+    """
+
+    try:
+        with open(filename, 'r') as input:
+            manifest = json.load(input)
+    except (OSError, ValueError):
+        return {}
+
+    if type(manifest) is not dict or manifest.get('version') != 1:
+        return {}
+
+    return manifest.get('dirs', {})
+
+
+def read_meta(filename, data_keys, sep=',', max_lines=None, verbose=True,
+              records=False):
     """
     Read the meta section of a data file containing meta and raw data
 
@@ -413,9 +1045,11 @@ def read_meta(filename, data_keys, sep=',', max_lines=None, verbose=True):
         max_lines (None | int):  set a limit on how many lines of the file
             are checked
         verbose (bool):  toggle printing of warnings
+        records (bool):  return a {name: value} dict instead of a one row
+            DataFrame (cheaper when the meta of many files is combined)
 
     Returns:
-        pd.DataFrame of meta data or -1 if file does not exist
+        pd.DataFrame or dict of meta data or -1 if file does not exist
 
     """
 
@@ -425,31 +1059,220 @@ def read_meta(filename, data_keys, sep=',', max_lines=None, verbose=True):
         return -1
 
     # Get number of lines
-    if max_lines is None:
-        skiprows = meta_length(filename, data_keys)
+    skiprows = meta_length(filename, data_keys, max_lines=max_lines,
+                           verbose=verbose)
 
-    def _parse_meta(file):
-        key = []
-        val = []
+    if skiprows <= 1:
+        return _make_meta([], [], records)
+
+    lines = []
+    with _open(filename, 'rb') as file:
         for iline, line in enumerate(file):
-            if iline == skiprows - 1:  # break when needed rather than reading entire file
+            if iline >= skiprows - 1:  # break when needed rather than reading entire file
                 break
-            vals = line.split(sep)
-            key += [vals[0]]
-            ival = vals[1].lstrip(' ').strip(',\n\r')
-            val += [str_2_dtype(ival)]
+            lines += [line]
 
-        meta = pd.DataFrame(val).T
-        meta.columns = key
+    return _read_meta_lines(lines, sep, records)
 
-        return meta
 
-    if _is_gz(filename):
-        with gzip.open(filename, "rt") as file:
-            return _parse_meta(file)
-    else:
-        with open(filename, 'r') as file:
-            return _parse_meta(file)
+def scan_dir(path, prune=None, workers=1, scandir=None, manifest=None):
+    """
+    Walk a directory tree top-down using os.scandir
+
+    Directories are visited in the same order as os.walk (without following
+    symlinks) and, like os.walk, the subdirectory list of each directory can
+    be edited in place by the caller to skip directories.  With workers > 1,
+    subdirectories are listed ahead of time by a thread pool, which hides
+    the round-trip latency of network file systems; the output order does
+    not change.
+
+    If a manifest dict is provided, the listing of each directory is stored
+    in it along with the directory's modified time and reused on later
+    scans while that modified time is unchanged, so a rescan of a static
+    tree only needs one stat per directory.  Like git's "racy" check, a
+    directory modified within MANIFEST_RACY_NS of the time it is listed is
+    not stored (a file added in the same time stamp tick would not change
+    its modified time).  Entries below path that were not visited are
+    removed once the walk is complete.
+
+    Args:
+        path (str): top level directory
+        prune (None | callable): function of a directory path that returns
+            True to skip that directory and everything below it
+        workers (int): number of threads used to list directories
+        scandir (None | callable): replacement for os.scandir (ex. to
+            simulate a slow file system)
+        manifest (None | dict): {directory path: [modified time in ns,
+            subdirectory names, file names, symlinked subdirectory names]}
+            updated in place (see read_manifest/write_manifest)
+
+    Yields:
+        tuple of (directory path, list of subdirectory names, list of file
+        names)
+
+    """
+
+    scandir = os.scandir if scandir is None else scandir
+
+    def _list(top):
+        if manifest is not None:
+            start = time.time_ns()
+            try:
+                mtime = os.stat(top).st_mtime_ns
+            except OSError:
+                return None
+            cached = manifest.get(top)
+            if cached is not None and cached[0] == mtime:
+                return list(cached[1]), list(cached[2]), set(cached[3])
+
+        dirs, files, links = [], [], set()
+        try:
+            with scandir(top) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        files += [entry.name]
+                        continue
+                    dirs += [entry.name]
+                    try:
+                        if entry.is_symlink():
+                            links.add(entry.name)
+                    except OSError:
+                        pass
+        except OSError:
+            return None
+
+        if manifest is not None and mtime < start - MANIFEST_RACY_NS:
+            manifest[top] = [mtime, list(dirs), list(files), sorted(links)]
+        elif manifest is not None:
+            manifest.pop(top, None)
+
+        return dirs, files, links
+
+    executor = futures.ThreadPoolExecutor(workers) \
+        if workers is not None and workers > 1 else None
+    pending = {}
+    stack = [path]
+    visited = set()
+    try:
+        while len(stack) > 0:
+            top = stack.pop()
+            visited.add(top)
+            listing = pending.pop(top).result() if top in pending \
+                else _list(top)
+            if listing is None:
+                continue
+            dirs, files, links = listing
+
+            subdirs = [osjoin(top, d) for d in dirs if d not in links]
+            if prune is not None:
+                subdirs = [d for d in subdirs if not prune(d)]
+            if executor is not None:
+                for d in subdirs:
+                    pending[d] = executor.submit(_list, d)
+
+            yield top, dirs, files
+
+            # Keep only the subdirectories left after any in-place edits
+            keep = set([osjoin(top, d) for d in dirs])
+            for d in subdirs:
+                if d not in keep and d in pending:
+                    pending.pop(d).cancel()
+            stack += reversed([d for d in subdirs if d in keep])
+
+        # Drop directories that no longer exist (or were skipped)
+        if manifest is not None:
+            below = path.rstrip(os.sep) + os.sep
+            for d in [f for f in manifest.keys()
+                      if f not in visited and (f == path
+                                               or f.startswith(below))]:
+                manifest.pop(d)
+    finally:
+        if executor is not None:
+            for future in pending.values():
+                future.cancel()
+            executor.shutdown()
+
+
+def series_2_dtype(values, ignore_list=False, unify=True):
+    """
+    Convert a column of strings with the rules of str_2_dtype
+
+    Each unique value is converted once.  When there are many unique
+    values, empty strings, None, bools, ints, floats and plain strings are
+    detected with vectorized string matching and only the values that may
+    hold comments, quotes or containers go through str_2_dtype
+
+    Args:
+        values (pd.Series|list): strings to convert (missing values stay
+            missing)
+        ignore_list (bool):  ignore option to convert to list
+        unify (bool):  give the column a single dtype (ex. int64 for ints,
+            float64 for ints and floats or ints with None) like a DataFrame
+            column built from the converted values; if False the values are
+            returned exactly as str_2_dtype converts them in an object
+            Series
+
+    Returns:
+        pd.Series of converted values
+    """
+
+    if not isinstance(values, pd.Series):
+        values = pd.Series(values, dtype=object)
+
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    out = np.empty(len(uniques), dtype=object)
+    todo = np.ones(len(uniques), dtype=bool)
+
+    if len(uniques) >= SERIES_2_DTYPE_MIN:
+        is_str = np.array([type(f) is str for f in uniques], dtype=bool)
+        strings = pd.Series(np.where(is_str, uniques, ''), dtype=str)
+        structured = strings.str.contains(RE_STRUCTURED.pattern).to_numpy() \
+            | strings.str.isspace().to_numpy()
+
+        # Empty, None and bools
+        for value, converted in [('', ''), ('None', None), ('True', True),
+                                 ('False', False)]:
+            mask = is_str & (strings == value).to_numpy()
+            out[mask] = converted
+            todo &= ~mask
+
+        # Numbers (ints too long for int64 are left to str_2_dtype)
+        is_int = todo & is_str & ~structured & \
+            strings.str.fullmatch(RE_INT.pattern).to_numpy()
+        fits = is_int & (strings.str.len() <= 18).to_numpy()
+        out[fits] = strings[fits].astype(np.int64).to_numpy()
+        todo &= ~fits
+        is_float = todo & is_str & ~structured & ~is_int & \
+            strings.str.fullmatch(RE_FLOAT.pattern).to_numpy()
+        out[is_float] = strings[is_float].astype(float).to_numpy()
+        todo &= ~is_float
+
+        # Plain strings
+        is_text = todo & is_str & ~structured & \
+            strings.str.match(RE_TEXT.pattern).to_numpy()
+        out[is_text] = strings[is_text].str.strip().to_numpy()
+        todo &= ~is_text
+
+    # Everything else
+    for i in np.flatnonzero(todo):
+        out[i] = str_2_dtype(uniques[i], ignore_list=ignore_list)
+
+    values_out = np.empty(len(codes), dtype=object)
+    values_out[:] = np.nan
+    found = codes >= 0
+    values_out[found] = out[codes[found]]
+    converted = pd.Series(values_out, index=values.index, dtype=object,
+                          name=values.name)
+
+    if unify:
+        return converted.infer_objects()
+
+    return converted
 
 
 def set_filemode(name, stmode='r'):
@@ -487,6 +1310,11 @@ def set_filemode(name, stmode='r'):
 def str_2_dtype(val, ignore_list=False):
     """
     Convert a string to the most appropriate data type
+
+    Values without comment, quote, escape or container characters are
+    converted directly (None, bools, ints, floats and plain strings);
+    anything else goes through the full parse, which is memoized
+
     Args:
         val (str): string value to convert
         ignore_list (bool):  ignore option to convert to list
@@ -494,107 +1322,47 @@ def str_2_dtype(val, ignore_list=False):
     Returns:
         val with the interpreted data type
     """
+
     if len(val) == 0:
         return ''
 
-    # Special chars
-    chars = {'\\t':'\t', '\\n':'\n', '\\r':'\r'}
-
-    # Remove comments
-    v = re.split("#(?=([^\"]*\"[^\"]*\")*[^\"]*$)", val)
-    if len(v) > 1:  # handle comments
-        v = [f for f in v if f is not None]
-        if v[0] == '':
-            val = '#' + v[1].rstrip().lstrip()
-        else:
-            val = v[0].rstrip().lstrip()
-
-    # Special
-    if val in chars.keys():
-        val = chars[val]
-    # None
-    if val == 'None':
-        return None
-    # bool
-    if val == 'True':
-        return True
-    if val == 'False':
-        return False
-    # dict
-    if ':' in val and '{' in val:
-        val = val.replace('{','').replace('}','')
-        val = re.split(''',(?=(?:[^'"]|'[^']*'|"[^"]*")*$)''', val)
-        k = []
-        v = []
-        for t in val:
-            tt = re.split(''':(?=(?:[^'"]|'[^']*'|"[^"]*")*$)''', t)
-            k += [str_2_dtype(tt[0], ignore_list=True)]
-            v += [str_2_dtype(':'.join(tt[1:]))]
-        return dict(zip(k,v))
-    # tuple
-    if val[0] == '(' and val[-1] == ')' and ',' in val:
-        return ast.literal_eval(val)
-    # list
-    if (',' in val or val.lstrip(' ')[0] == '[') and not ignore_list \
-            and val != ',':
-        if val[0] == '"' and val[-1] == '"' and ', ' not in val:
-            return str(val.replace('"', ''))
-        if val.lstrip(' ')[0] == '[':
-            val = val.lstrip('[').rstrip(']')
-        val = val.replace(', ', ',')
-        new = []
-        val = re.split(',(?=(?:"[^"]*?(?: [^"]*)*))|,(?=[^",]+(?:,|$))', val)
-        for v in val:
-            if '=="' in v:
-                new += [v.rstrip().lstrip()]
-            elif '"' in v:
-                double_quoted = [f for f in re.findall(r'"([^"]*)"', v)
-                                 if f != '']
-                v = str(v.replace('"', ''))
-                for dq in double_quoted:
-                    v = v.replace(dq, '"%s"' % dq)
-                try:
-                    if type(ast.literal_eval(v.lstrip())) is str:
-                        v = ast.literal_eval(v.lstrip())
-                    new += [v]
-                except:
-                    new += [v.replace('"','').rstrip().lstrip()]
-            else:
-                try:
-                    new += [str_2_dtype(v.replace('"','').rstrip().lstrip())]
-                except RecursionError:
-                    pass
-        if len(new) == 1:
-            return new[0]
-        return new
-    # float and int
-
-    try:
-        int(val)
-        return int(val)
-    except:
+    # Fast path
+    if RE_STRUCTURED.search(val) is None and not val.isspace():
+        if val == 'None':
+            return None
+        if val == 'True':
+            return True
+        if val == 'False':
+            return False
+        if RE_INT.fullmatch(val):
+            return int(val)
+        if RE_FLOAT.fullmatch(val):
+            return float(val)
+        if RE_TEXT.match(val):
+            return val.strip()
+        try:
+            return int(val)
+        except ValueError:
+            pass
         try:
-            float(val)
             return float(val)
-        except:
-            v = val.split('#')
-            if len(v) > 1:  # handle comments
-                if v[0] == '':
-                    return '#' + v[1].rstrip().lstrip()
-                else:
-                    return v[0].rstrip().lstrip()
-            else:
-                val = val.rstrip().lstrip()
-                if val[0] in ['"', "'"] and val[-1] in ['"', "'"]:
-                    return val.strip('\'"')
-                else:
-                    return val
+        except ValueError:
+            return val.strip()
+
+    value = _str_2_dtype_cached(val, ignore_list)
+    if type(value) in [dict, list, tuple]:
+        return copy.deepcopy(value)
+
+    return value
 
 
 def write_data(filename, df, meta=None, data_key='[DATA]', align=False, **kwargs):
     """
     Write data files containing a meta section, separator keyword, and raw data
 
+    The file is compressed according to its extension (.gz, .bz2, .xz, .zst
+    or .lz4); without meta, data is appended to an existing file
+
     Args:
         filename (str): output file path
         df (pd.DataFrame):  DataFrame to save
@@ -603,6 +1371,10 @@ def write_data(filename, df, meta=None, data_key='[DATA]', align=False, **kwargs
         data_key (str): separator between meta and df
         align (bool): pad values to align csv and make it more human readable
 
+    Keyword Args:
+        threads (int): number of threads used for zstd compression
+            (-1 = all cores); default=0
+
     Returns:
         None
 
@@ -612,37 +1384,43 @@ def write_data(filename, df, meta=None, data_key='[DATA]', align=False, **kwargs
     sep = kwargs.get('sep', ',')
     first_col = kwargs.get('first_col', 0)
     rjust = kwargs.get('rjust', True)
+    threads = kwargs.get('threads', 0)
 
-    compression = 'gzip' if _is_gz(filename) else None
+    # Append to an existing file if there is no meta
+    mode, is_header = 'wt', True
+    if meta is None and os.path.isfile(filename):
+        mode, is_header = 'at', False
 
-    # Write meta data
-    if meta is not None:
-        meta.T.to_csv(filename, mode='w', header=False,
-                      sep=sep_meta, compression=compression)
+    # Align the raw data
+    df = align_values(df, first_col=first_col, rjust=rjust) if align else df
 
-    def _write_separator(output):
-        output.write('%s\n' % data_key)
+    with _open(filename, mode, threads=threads, newline='') as output:
+        # Write meta data and the data separator
+        if meta is not None:
+            meta.T.to_csv(output, header=False, sep=sep_meta)
+            output.write('%s%s' % (data_key, os.linesep))
 
-    # Write data separator
-    mode, is_header = 'a', True   # pandas doesn't need the binary/ascii distinction
-    if meta is None:
-        if os.path.isfile(filename):
-            is_header = False
-        else:
-            mode = 'w'
-    else:
-        if _is_gz(filename):
-            with gzip.open(filename, 'at') as output:
-                _write_separator(output)
-        else:
-            with open(filename, 'a') as output:
-                _write_separator(output)
+        # Write the raw data
+        df.to_csv(output, index=False, sep=sep, header=is_header)
 
-    # Align the raw data
-    df = align_values(df, first_col=first_col, rjust=rjust) if align else df
 
-    # Write the raw data
-    df.to_csv(filename, index=False, mode=mode, sep=sep, compression=compression, header=is_header)
+def write_manifest(filename, manifest):
+    """
+    Save a directory manifest built by scan_dir
+
+    Args:
+        filename (str): path to the manifest file
+        manifest (dict): manifest dict from scan_dir
+
+    Returns:
+        None
+
+    """
+
+    temp = '%s.%s.tmp' % (filename, os.getpid())
+    with open(temp, 'w') as output:
+        json.dump({'version': 1, 'dirs': manifest}, output)
+    os.replace(temp, filename)
 
 
 def validate_list(items):